@@ -0,0 +1,452 @@
+import numpy as np
+
+import rules
+from rules import (
+    RANK_A, RANK_10, RANK_J, RANK_Q, RANK_K, RANK_JOKER, DESC, UNDEFINED, ASC, MIN_CARAVAN_THRESHOLD,
+    MAX_CARAVAN_THRESHOLD, MAX_CARAVAN_LAYERS, MAX_FACE_CARDS_PER_LAYER, STARTING_HAND_SIZE, MIN_HAND_SIZE,
+    BEGINNING_PHASE_MOVES, DISCARD_CARD, DISCARD_CARAVAN, PLAY_CARD, Move
+)
+
+
+EMPTY = 0  # No card is encoded as 0, so it marks empty hand, pile, layer and face slots
+
+NUM_CARAVANS = 6
+DECK_SIZE = 54
+NUM_NUMERICAL_CARDS = 40
+MAX_HAND_SIZE = STARTING_HAND_SIZE  # A hand never grows back above its starting size
+DRAW_PILE_SIZE = DECK_SIZE - STARTING_HAND_SIZE
+
+# """
+# Every game picks its move from the same flat action space:
+#     [0, 48)     numerical card of hand slot h onto caravan c                  h * 6 + c
+#     [48, 384)   face card of hand slot h onto layer l of caravan c            48 + h * 42 + c * 7 + l
+#     [384, 392)  discard hand slot h                                           384 + h
+#     [392, 398)  discard caravan c                                             392 + c
+# """
+NUMERICAL_OFFSET = 0
+FACE_OFFSET = NUMERICAL_OFFSET + MAX_HAND_SIZE * NUM_CARAVANS
+DISCARD_CARD_OFFSET = FACE_OFFSET + MAX_HAND_SIZE * NUM_CARAVANS * MAX_CARAVAN_LAYERS
+DISCARD_CARAVAN_OFFSET = DISCARD_CARD_OFFSET + MAX_HAND_SIZE
+NUM_ACTIONS = DISCARD_CARAVAN_OFFSET + NUM_CARAVANS
+
+NO_ACTION = -1
+
+REJECTION_ROUNDS = 16
+
+CARD_DTYPE = np.int8  # The largest card code is 118
+
+
+# """
+# NumPy reductions over a tiny trailing axis (three face slots, three caravans) are far slower than adding up its
+# slices, so the helpers below unroll them.
+# """
+def _sum_last_axis(array, dtype=np.int8):
+    total = array[..., 0].astype(dtype)
+    for i in range(1, array.shape[-1]):
+        total += array[..., i]
+    return total
+
+
+def _gather(array, index):
+    # np.take_along_axis along the axis that follows the leading axes of `index`, done with one flat fancy index
+    lead = index.ndim - 1
+    flat = array.reshape(-1, *array.shape[lead:])
+    rows = np.arange(flat.shape[0])[:, None]
+    return flat[rows, index.reshape(flat.shape[0], index.shape[-1])].reshape(*index.shape, *array.shape[lead + 1:])
+
+
+def _take_last_axis(array, index):
+    return _gather(array, index[..., None]).squeeze(axis=index.ndim)
+
+
+def calculate_values(layers, faces):
+    kings = _sum_last_axis((faces >> 3) == RANK_K)
+    return _sum_last_axis((layers.astype(np.int32) >> 3) << kings, np.int32)
+
+
+def _suits_and_directions(layers, faces, layer_counts):
+    card_2 = _take_last_axis(layers, np.maximum(layer_counts - 1, 0))
+    adjacents = _take_last_axis(faces, np.maximum(layer_counts - 1, 0))
+    card_1 = _take_last_axis(layers, np.maximum(layer_counts - 2, 0))
+
+    suit = card_2 & 7
+    flips = np.zeros(suit.shape, dtype=bool)
+    for i in range(adjacents.shape[-1]):
+        queen = (adjacents[..., i] >> 3) == RANK_Q
+        suit = np.where(queen, adjacents[..., i] & 7, suit)
+        flips ^= queen
+    suit = np.where(layer_counts > 0, suit, UNDEFINED)
+
+    direction = np.where(card_1 >> 3 >= card_2 >> 3, np.int8(DESC), np.int8(ASC))  # Equal ranks count as decreasing, as in FNV
+    direction = np.where(flips, -direction, direction)
+    direction = np.where(layer_counts > 1, direction, UNDEFINED)
+    return card_2, suit, direction
+
+
+def calculate_suits(layers, faces, layer_counts):
+    return _suits_and_directions(layers, faces, layer_counts)[1]
+
+
+def calculate_directions(layers, faces, layer_counts):
+    return _suits_and_directions(layers, faces, layer_counts)[2]
+
+
+def is_sold(values):
+    return (MIN_CARAVAN_THRESHOLD <= values) & (values <= MAX_CARAVAN_THRESHOLD)
+
+
+def check_winning_condition(values):
+    # """
+    # Vectorized `rules.check_winning_condition` over the last axis of six caravan values, 0 means no winner yet.
+    # """
+    sold = is_sold(values)
+    mine, theirs = values[..., :3], values[..., 3:]
+    decided = _sum_last_axis((sold[..., :3] | sold[..., 3:]) & (mine != theirs)) == 3
+    p1_win_count = _sum_last_axis((theirs > MAX_CARAVAN_THRESHOLD) | ((mine <= MAX_CARAVAN_THRESHOLD) & (mine > theirs)))
+    return np.where(decided, np.where(p1_win_count >= 2, 1, 2), 0)
+
+
+class BatchGameState:
+    # """
+    # N Standard Mode games held as arrays and advanced in lockstep, one move per game per `step`. The rules are the
+    # ones of `rules.GameState`, hands keep the same card order and the top of a drawing pile is `draw_tops`.
+    # """
+    def __init__(self, num_games, seed=None):
+        n = num_games
+        self.num_games = n
+        self.rng = np.random.default_rng(seed)
+
+        self.hands = np.zeros((n, 2, MAX_HAND_SIZE), dtype=CARD_DTYPE)
+        self.hand_counts = np.zeros((n, 2), dtype=np.int16)
+        self.draw_piles = np.zeros((n, 2, DRAW_PILE_SIZE), dtype=CARD_DTYPE)
+        self.draw_tops = np.zeros((n, 2), dtype=np.int16)
+        self.draw_counts = np.zeros((n, 2), dtype=np.int16)
+
+        self.layers = np.zeros((n, NUM_CARAVANS, MAX_CARAVAN_LAYERS), dtype=CARD_DTYPE)
+        self.faces = np.zeros((n, NUM_CARAVANS, MAX_CARAVAN_LAYERS, MAX_FACE_CARDS_PER_LAYER), dtype=CARD_DTYPE)
+        self.layer_counts = np.zeros((n, NUM_CARAVANS), dtype=np.int16)
+        self.face_counts = np.zeros((n, NUM_CARAVANS, MAX_CARAVAN_LAYERS), dtype=np.int16)
+
+        self.turns = np.ones(n, dtype=np.int8)
+        self.beginning_phase_counters = np.full((n, 2), BEGINNING_PHASE_MOVES, dtype=np.int8)
+        self.turn_counts = np.zeros(n, dtype=np.int32)
+        self.winners = np.zeros(n, dtype=np.int8)
+        self.done = np.zeros(n, dtype=bool)
+
+    def deal(self):
+        # """
+        # Vectorized `rules.generate_valid_player_and_drawing_deck` for both players of every game: three random
+        # numerical cards plus five random cards form the hand, the rest is shuffled into the drawing pile.
+        # """
+        n = self.num_games
+        deck = np.array(rules.generate_all_cards(), dtype=CARD_DTYPE)
+
+        numeric = np.argsort(self.rng.random((n, 2, NUM_NUMERICAL_CARDS)), axis=-1)[..., :3]
+        keys = self.rng.random((n, 2, DECK_SIZE))
+        np.put_along_axis(keys, numeric, np.inf, axis=-1)
+        rest = np.argsort(keys, axis=-1)[..., :DECK_SIZE - 3]
+
+        self.hands[...] = deck[np.concatenate([numeric, rest[..., :MIN_HAND_SIZE]], axis=-1)]
+        self.hand_counts[...] = STARTING_HAND_SIZE
+        self.draw_piles[...] = deck[rest[..., MIN_HAND_SIZE:]]
+        self.draw_tops[...] = 0
+        self.draw_counts[...] = DRAW_PILE_SIZE
+        return self
+
+    @classmethod
+    def from_game_states(cls, states: list[rules.GameState], seed=None):
+        batch = cls(len(states), seed)
+        for i, state in enumerate(states):
+            for p in range(2):
+                hand, pile = state.hands[p], state.draw_piles[p]
+                batch.hands[i, p, :len(hand)] = hand
+                batch.hand_counts[i, p] = len(hand)
+                batch.draw_piles[i, p, :len(pile)] = pile
+                batch.draw_counts[i, p] = len(pile)
+            for c, caravan in enumerate(state.caravans):
+                batch.layer_counts[i, c] = len(caravan.layers)
+                for l, (card, adjacents) in enumerate(caravan.layers):
+                    batch.layers[i, c, l] = card
+                    batch.faces[i, c, l, :len(adjacents)] = adjacents
+                    batch.face_counts[i, c, l] = len(adjacents)
+            batch.turns[i] = state.turn
+            batch.beginning_phase_counters[i] = state.beginning_phase_counters
+        return batch
+
+    def to_game_state(self, i):
+        hands = [list(map(int, self.hands[i, p, :self.hand_counts[i, p]])) for p in range(2)]
+        piles = [
+            list(map(int, self.draw_piles[i, p, self.draw_tops[i, p]:self.draw_tops[i, p] + self.draw_counts[i, p]]))
+            for p in range(2)
+        ]
+        caravans = [
+            rules.CaravanState([
+                [int(self.layers[i, c, l]), list(map(int, self.faces[i, c, l, :self.face_counts[i, c, l]]))]
+                for l in range(self.layer_counts[i, c])
+            ])
+            for c in range(NUM_CARAVANS)
+        ]
+        return rules.GameState(hands, piles, caravans, int(self.turns[i]), list(map(int, self.beginning_phase_counters[i])))
+
+    def calculate_values(self):
+        return calculate_values(self.layers, self.faces)
+
+    def calculate_suits(self):
+        return calculate_suits(self.layers, self.faces, self.layer_counts)
+
+    def calculate_directions(self):
+        return calculate_directions(self.layers, self.faces, self.layer_counts)
+
+    def legal_action_mask(self):
+        # """
+        # Boolean (games, NUM_ACTIONS) mask of the moves the player to move may make, all False for finished games.
+        # Broadcasting over the short hand and caravan axes is slow in NumPy, so the mask is built with the games on
+        # the last axis and the transposed view is returned.
+        # """
+        n = self.num_games
+        games = np.arange(n)
+        players = self.turns.astype(np.intp) - 1
+        hands = np.ascontiguousarray(self.hands[games, players].T)  # (h, n)
+        ranks = hands >> 3
+        suits = hands & 7
+        in_hand = np.arange(MAX_HAND_SIZE)[:, None] < self.hand_counts[games, players][None, :]
+        beginning = self.beginning_phase_counters[games, players] > 0
+        playable = in_hand & ~(beginning | self.done)
+
+        owned = (np.arange(NUM_CARAVANS)[:, None] // 3) == players[None, :]  # (c, n)
+        counts = self.layer_counts.T
+        last_card, caravan_suits, directions = _suits_and_directions(self.layers, self.faces, self.layer_counts)
+        last_ranks = np.ascontiguousarray((last_card >> 3).T)[None]  # (1, c, n)
+        directions = np.ascontiguousarray(directions.T)[None]
+        caravan_suits = np.ascontiguousarray(caravan_suits.T)[None]
+        r, s = ranks[:, None], suits[:, None]  # (h, 1, n)
+
+        follows_direction = ((last_ranks > r) & (directions != ASC)) | ((last_ranks < r) & (directions != DESC))
+        follows_suit = (s == caravan_suits) & (r != last_ranks)
+        empty = counts == 0
+        open_caravans = (empty | (~beginning & (counts < MAX_CARAVAN_LAYERS))) & owned & ~self.done  # (c, n)
+        numerical = (
+            ((RANK_A <= r) & (r <= RANK_10) & in_hand[:, None])
+            & open_caravans[None]
+            & (empty[None] | follows_direction | follows_suit)
+        )
+
+        # Jacks may go on any existing layer, the other face cards need a free face slot on it
+        layer_exists = (np.arange(MAX_CARAVAN_LAYERS)[None, :, None] < counts[:, None, :]).reshape(1, -1, n)
+        has_room = layer_exists & (self.face_counts < MAX_FACE_CARDS_PER_LAYER).reshape(n, -1).T[None]
+        jacks = ((ranks == RANK_J) & playable)[:, None]
+        other_faces = ((RANK_Q <= ranks) & (ranks <= RANK_JOKER) & playable)[:, None]
+        face = (jacks & layer_exists) | (other_faces & has_room)
+
+        mask = np.empty((NUM_ACTIONS, n), dtype=bool)
+        mask[:FACE_OFFSET] = numerical.reshape(-1, n)
+        mask[FACE_OFFSET:DISCARD_CARD_OFFSET] = face.reshape(-1, n)
+        mask[DISCARD_CARD_OFFSET:DISCARD_CARAVAN_OFFSET] = playable
+        mask[DISCARD_CARAVAN_OFFSET:] = owned & ~empty & ~(beginning | self.done)
+        return mask.T
+
+    def select_random_actions(self, mask):
+        # """
+        # Vectorized `players.RandomPlayer.select_move`: play a card 95% of the time, discard a card 4% of the time and
+        # discard a caravan otherwise, falling back to what is available.
+        # """
+        n = self.num_games
+        has_play = mask[:, :DISCARD_CARD_OFFSET].any(axis=1)
+        has_discard = mask[:, DISCARD_CARD_OFFSET:DISCARD_CARAVAN_OFFSET].any(axis=1)
+        has_caravan = mask[:, DISCARD_CARAVAN_OFFSET:].any(axis=1)
+
+        r = self.rng.random(n)
+        play = (r < 0.95) & has_play
+        discard = ~play & (r < 0.99) & has_discard
+        caravan = ~play & ~discard & has_caravan
+        fallback = ~play & ~discard & ~caravan
+        play |= fallback & has_play
+        discard |= fallback & ~has_play
+
+        candidates = mask.copy()
+        candidates[~play, :DISCARD_CARD_OFFSET] = False
+        candidates[~discard, DISCARD_CARD_OFFSET:DISCARD_CARAVAN_OFFSET] = False
+        candidates[~caravan, DISCARD_CARAVAN_OFFSET:] = False
+        low = np.select([play, discard], [0, DISCARD_CARD_OFFSET], DISCARD_CARAVAN_OFFSET)
+        high = np.select([play, discard], [DISCARD_CARD_OFFSET, DISCARD_CARAVAN_OFFSET], NUM_ACTIONS)
+
+        # Uniform pick among the candidates of each game: a few rounds of rejection sampling inside the chosen block
+        # settle almost every game, the rest pick by rank from the list of their candidates
+        actions = np.full(n, NO_ACTION)
+        pending = np.flatnonzero(has_play | has_discard | has_caravan)
+        for _ in range(REJECTION_ROUNDS):
+            guesses = low[pending] + (self.rng.random(len(pending)) * (high - low)[pending]).astype(np.intp)
+            accepted = candidates[pending, guesses]
+            actions[pending[accepted]] = guesses[accepted]
+            pending = pending[~accepted]
+            if len(pending) == 0:
+                return actions
+
+        rows, columns = np.nonzero(candidates[pending])
+        counts = np.bincount(rows, minlength=len(pending))
+        picks = np.cumsum(counts) - counts + (self.rng.random(len(pending)) * counts).astype(np.intp)
+        actions[pending] = columns[picks]
+        return actions
+
+    def step(self, actions):
+        # """
+        # Apply one action per game. Finished games and games given `NO_ACTION` are left untouched.
+        # """
+        actions = np.asarray(actions)
+        games = np.flatnonzero((actions != NO_ACTION) & ~self.done)
+        if len(games) == 0:
+            return
+        actions = actions[games]
+        players = self.turns[games].astype(np.intp) - 1
+
+        plays_numerical = actions < FACE_OFFSET
+        plays_face = (FACE_OFFSET <= actions) & (actions < DISCARD_CARD_OFFSET)
+        discards_card = (DISCARD_CARD_OFFSET <= actions) & (actions < DISCARD_CARAVAN_OFFSET)
+        discards_caravan = actions >= DISCARD_CARAVAN_OFFSET
+
+        face_actions = actions - FACE_OFFSET
+        hand_slots = np.select(
+            [plays_numerical, plays_face, discards_card],
+            [actions // NUM_CARAVANS, face_actions // (NUM_CARAVANS * MAX_CARAVAN_LAYERS), actions - DISCARD_CARD_OFFSET],
+            0
+        )
+        caravans = np.select(
+            [plays_numerical, plays_face, discards_caravan],
+            [actions % NUM_CARAVANS, face_actions // MAX_CARAVAN_LAYERS % NUM_CARAVANS, actions - DISCARD_CARAVAN_OFFSET],
+            0
+        )
+        layers = np.where(plays_face, face_actions % MAX_CARAVAN_LAYERS, 0)
+        cards = self.hands[games, players, hand_slots]
+        ranks = cards >> 3
+
+        uses_card = ~discards_caravan
+        self._remove_from_hands(games[uses_card], players[uses_card], hand_slots[uses_card])
+
+        # Numerical cards start a new layer
+        g, c, card = games[plays_numerical], caravans[plays_numerical], cards[plays_numerical]
+        count = self.layer_counts[g, c]
+        self.layers[g, c, count] = card
+        self.face_counts[g, c, count] = 0
+        self.layer_counts[g, c] += 1
+
+        # Queens, Kings and Jokers stay on their layer, a Jack takes the whole layer (itself included) with it
+        stays = plays_face & (ranks != RANK_J)
+        g, c, l = games[stays], caravans[stays], layers[stays]
+        self.faces[g, c, l, self.face_counts[g, c, l]] = cards[stays]
+        self.face_counts[g, c, l] += 1
+
+        jacks = plays_face & (ranks == RANK_J)
+        if jacks.any():
+            mask = np.zeros((jacks.sum(), NUM_CARAVANS, MAX_CARAVAN_LAYERS), dtype=bool)
+            mask[np.arange(len(mask)), caravans[jacks], layers[jacks]] = True
+            self._remove_layers(games[jacks], mask)
+
+        jokers = plays_face & (ranks == RANK_JOKER)
+        if jokers.any():
+            g, c, l = games[jokers], caravans[jokers], layers[jokers]
+            template = self.layers[g, c, l][:, None, None]
+            candidates = self.layers[g]
+            matches = np.where(
+                (template >> 3) == RANK_A,
+                (candidates & 7) == (template & 7),
+                (candidates >> 3) == (template >> 3)
+            )
+            matches &= np.arange(MAX_CARAVAN_LAYERS)[None, None, :] < self.layer_counts[g][:, :, None]
+            matches[np.arange(len(g)), c, l] = False
+            self._remove_layers(g, matches)
+
+        g, c = games[discards_caravan], caravans[discards_caravan]
+        self.layers[g, c] = EMPTY
+        self.faces[g, c] = EMPTY
+        self.face_counts[g, c] = 0
+        self.layer_counts[g, c] = 0
+
+        # Refill the hand after a discard, or after a play that left fewer than five cards
+        plays = plays_numerical | plays_face
+        draws = discards_card | (plays & (self.hand_counts[games, players] < MIN_HAND_SIZE))
+        draws &= self.draw_counts[games, players] > 0
+        g, p = games[draws], players[draws]
+        self.hands[g, p, self.hand_counts[g, p]] = self.draw_piles[g, p, self.draw_tops[g, p]]
+        self.hand_counts[g, p] += 1
+        self.draw_tops[g, p] += 1
+        self.draw_counts[g, p] -= 1
+
+        g, p = games[plays], players[plays]
+        self.beginning_phase_counters[g, p] = np.maximum(self.beginning_phase_counters[g, p] - 1, 0)
+
+        self.turns[games] = 3 - self.turns[games]
+        self.turn_counts[games] += 1
+
+        winners = check_winning_condition(self.calculate_values())[games]
+        self.winners[games] = winners
+        self.done[games] |= winners > 0
+
+    def _remove_from_hands(self, games, players, slots):
+        positions = np.arange(MAX_HAND_SIZE)[None, :]
+        source = np.minimum(positions + (positions >= slots[:, None]), MAX_HAND_SIZE - 1)
+        hands = _gather(self.hands[games, players], source)
+        self.hand_counts[games, players] -= 1
+        hands[positions >= self.hand_counts[games, players][:, None]] = EMPTY
+        self.hands[games, players] = hands
+
+    def _remove_layers(self, games, mask):
+        # """
+        # Drop the masked (game, caravan, layer) entries and slide the remaining layers down, keeping their order.
+        # """
+        order = np.argsort(mask, axis=-1, kind='stable')
+        layers = _gather(self.layers[games], order)
+        faces = _gather(self.faces[games], order)
+        face_counts = _gather(self.face_counts[games], order)
+
+        counts = self.layer_counts[games] - _sum_last_axis(mask)
+        kept = np.arange(MAX_CARAVAN_LAYERS)[None, None, :] < counts[..., None]
+        layers *= kept
+        faces *= kept[..., None]
+        face_counts *= kept
+
+        self.layers[games] = layers
+        self.faces[games] = faces
+        self.face_counts[games] = face_counts
+        self.layer_counts[games] = counts
+
+    def play_random(self, max_turns=500):
+        # """
+        # Let `RandomPlayer`-like policies play every game to the end. Games without a legal move, or that reach
+        # `max_turns`, finish without a winner.
+        # """
+        while not self.done.all():
+            mask = self.legal_action_mask()
+            self.done |= ~mask.any(axis=1) | (self.turn_counts >= max_turns)
+            self.step(self.select_random_actions(mask))
+        return self.winners
+
+
+def decode_action(action, state: rules.GameState):
+    # """
+    # Translate a batch action into the matching `rules.GameState.legal_moves` move.
+    # """
+    if action < FACE_OFFSET:
+        hand_index, caravan = divmod(action, NUM_CARAVANS)
+        return Move(PLAY_CARD, hand_index, caravan, len(state.caravans[caravan].layers) - 1)
+    if action < DISCARD_CARD_OFFSET:
+        hand_index, rest = divmod(action - FACE_OFFSET, NUM_CARAVANS * MAX_CARAVAN_LAYERS)
+        return Move(PLAY_CARD, hand_index, *divmod(rest, MAX_CARAVAN_LAYERS))
+    if action < DISCARD_CARAVAN_OFFSET:
+        return Move(DISCARD_CARD, action - DISCARD_CARD_OFFSET)
+    return Move(DISCARD_CARAVAN, caravan_index=action - DISCARD_CARAVAN_OFFSET)
+
+
+def encode_move(move: Move, state: rules.GameState):
+    if move.kind == PLAY_CARD:
+        if rules.is_numerical(state.hands[state.turn - 1][move.hand_index]):
+            return NUMERICAL_OFFSET + move.hand_index * NUM_CARAVANS + move.caravan_index
+        return FACE_OFFSET + (move.hand_index * NUM_CARAVANS + move.caravan_index) * MAX_CARAVAN_LAYERS + move.layer
+    if move.kind == DISCARD_CARD:
+        return DISCARD_CARD_OFFSET + move.hand_index
+    return DISCARD_CARAVAN_OFFSET + move.caravan_index
+
+
+def play_random_games(num_games, seed=None, max_turns=500):
+    batch = BatchGameState(num_games, seed).deal()
+    batch.play_random(max_turns)
+    return batch
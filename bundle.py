@@ -0,0 +1,30 @@
+import glob
+
+from cards import CARD_SIZE, card_image_paths
+from graphics import WINDOW_WIDTH, WINDOW_HEIGHT
+from resources import build_bundle, BUNDLE_PATH
+
+
+# """
+# Everything that goes into the asset bundle (see `resources`): every image at its original size, plus each size the
+# game scales it to. An image requested at a size that is not listed here is still loaded, from its file.
+# """
+CARD_IMAGE_PATHS = [
+    *card_image_paths.values(),
+    'assets/cards/card_back.png', 'assets/cards/card_empty.png', 'assets/cards/card_empty_outline.png'
+]
+BUTTON_SIZES = [(WINDOW_WIDTH // 4, WINDOW_HEIGHT // 6), (128, 64), (64, 64)]
+
+
+def bundle_entries():
+    entries = [(path, None) for folder in ['cards', 'texts', 'backgrounds'] for path in sorted(glob.glob(f'assets/{folder}/*.png'))]
+    entries += [(path, (CARD_SIZE, CARD_SIZE)) for path in CARD_IMAGE_PATHS]
+    entries += [('assets/backgrounds/background.png', (WINDOW_WIDTH, WINDOW_HEIGHT))]
+    entries += [('assets/backgrounds/actual_trash.png', (96, 96)), ('assets/backgrounds/actual_trash_open.png', (96, 96))]
+    entries += [('assets/backgrounds/button.png', size) for size in BUTTON_SIZES]
+    return entries
+
+
+def build():
+    index = build_bundle(bundle_entries())
+    print(f'Bundled {len(index)} images into {BUNDLE_PATH}.bin')
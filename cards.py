@@ -1,87 +1,135 @@
 import math
+import threading
+from typing import NamedTuple
 
 import pygame
 
+from resources import load_image, rotate_image, tint_image
+from rules import (
+    RANK_A, RANK_2, RANK_3, RANK_4, RANK_5, RANK_6, RANK_7, RANK_8, RANK_9, RANK_10, RANK_J, RANK_Q, RANK_K, RANK_JOKER,
+    SUIT_SPADES, SUIT_HEARTS, SUIT_DIAMONDS, SUIT_CLUBS, SUIT_BLACK_JOKER, SUIT_RED_JOKER,
+    RANKS, RANK_NAMES, SUITS, SUIT_NAMES, make_card
+)
 
-RANK_A = 1
-RANK_2 = 2
-RANK_3 = 3
-RANK_4 = 4
-RANK_5 = 5
-RANK_6 = 6
-RANK_7 = 7
-RANK_8 = 8
-RANK_9 = 9
-RANK_10 = 10
-RANK_J = 11
-RANK_Q = 12
-RANK_K = 13
-RANK_JOKER = 14
-
-SUIT_SPADES = 1
-SUIT_HEARTS = 2
-SUIT_DIAMONDS = 3
-SUIT_CLUBS = 4
-SUIT_BLACK_JOKER = 5
-SUIT_RED_JOKER = 6
-
-RANKS = [RANK_A, RANK_2, RANK_3, RANK_4, RANK_5, RANK_6, RANK_7, RANK_8, RANK_9, RANK_10, RANK_J, RANK_Q, RANK_K, RANK_JOKER]
-RANK_NAMES = ['A', '02', '03', '04', '05', '06', '07', '08', '09', '10', 'J', 'Q', 'K', 'joker']
-
-SUITS = [SUIT_SPADES, SUIT_HEARTS, SUIT_DIAMONDS, SUIT_CLUBS, SUIT_BLACK_JOKER, SUIT_RED_JOKER]
-SUIT_NAMES = ['spades', 'hearts', 'diamonds', 'clubs', 'black', 'red']
 
 CARD_SIZE = 128
+HOVERED_TINT = (255, 255, 0, 255)
+CLICKED_TINT = (0, 255, 0, 255)
 
-card_images = {}
+card_image_paths = {}
 for rank, rank_name in zip(RANKS, RANK_NAMES):
     if rank == RANK_JOKER:
-        card_images[(RANK_JOKER, SUIT_BLACK_JOKER)] = pygame.image.load('assets/cards/card_black_joker_alt.png')
-        card_images[(RANK_JOKER, SUIT_RED_JOKER)] = pygame.image.load('assets/cards/card_red_joker_alt.png')
+        card_image_paths[(RANK_JOKER, SUIT_BLACK_JOKER)] = 'assets/cards/card_black_joker_alt.png'
+        card_image_paths[(RANK_JOKER, SUIT_RED_JOKER)] = 'assets/cards/card_red_joker_alt.png'
         continue
     for suit, suit_name in zip(SUITS[:-2], SUIT_NAMES[:-2]):
-        card_images[(rank, suit)] = pygame.image.load(f'assets/cards/card_{suit_name}_{rank_name}.png')
+        card_image_paths[(rank, suit)] = f'assets/cards/card_{suit_name}_{rank_name}.png'
 
-for card in card_images:
-    card_images[card] = pygame.transform.scale(card_images[card], (CARD_SIZE, CARD_SIZE))
 
+CARD_BACK_PATH = 'assets/cards/card_back.png'
 
-class Card:
-    def __init__(self, rank, suit):
-        self.rank: int = rank
-        self.suit: int = suit
-        self.original_image = card_images[(self.rank, self.suit)].convert_alpha()
-        self.original_back_image = pygame.image.load('assets/cards/card_back.png').convert_alpha()
-        self.original_back_image = pygame.transform.scale(self.original_back_image, (CARD_SIZE, CARD_SIZE))
-        self.image = card_images[(self.rank, self.suit)].convert_alpha()
 
-        self.back_image = self.original_back_image.copy()
+class CardFace(NamedTuple):
+    # What every card of one rank and suit (and back) shares: what it is to the rules engine and its artwork
+    rank: int
+    suit: int
+    code: int  # Integer representation used by the rules engine
+    image: pygame.Surface
+    back_image: pygame.Surface
+
 
-        self.hovered_image = self.image.copy()
-        self.hovered_image.fill((255, 255, 0, 255), special_flags=pygame.BLEND_MULT)
+card_faces: dict[tuple, CardFace] = {}  # (rank, suit, back path) -> face
 
-        self.clicked_image = self.image.copy()
-        self.clicked_image.fill((0, 255, 0, 255), special_flags=pygame.BLEND_MULT)
 
-        self.rect = self.image.get_rect()
-        self.center = self.rect.center
+def get_card_face(rank, suit, back_path=CARD_BACK_PATH):
+    key = rank, suit, back_path
+    face = card_faces.get(key)
+    if face is None:
+        face = card_faces[key] = CardFace(
+            rank, suit, make_card(rank, suit),
+            load_image(card_image_paths[(rank, suit)], (CARD_SIZE, CARD_SIZE)), load_image(back_path, (CARD_SIZE, CARD_SIZE))
+        )
+    return face
 
-        self.top_left = (int(23 * CARD_SIZE / 128) - CARD_SIZE // 2, int(4 * CARD_SIZE / 128) - CARD_SIZE // 2)
-        self.top_right = (int(106 * CARD_SIZE / 128) - CARD_SIZE // 2, int(4 * CARD_SIZE / 128) - CARD_SIZE // 2)
-        self.bottom_left = (int(23 * CARD_SIZE / 128) - CARD_SIZE // 2, int(124 * CARD_SIZE / 128) - CARD_SIZE // 2)
-        self.bottom_right = (int(106 * CARD_SIZE / 128) - CARD_SIZE // 2, int(124 * CARD_SIZE / 128) - CARD_SIZE // 2)
 
+class Card:
+    # """
+    # A card on the table is its shared `face` plus how it lies there: angle, rect, z-index and flags, in `__slots__`.
+    # It owns no surfaces, the sides on show are rotated and tinted on demand through the caches of `resources`.
+    # """
+    __slots__ = (
+        'face', 'angle', 'rect', 'polygon', 'z_index', '_image', '_back_image',
+        'is_visible', 'is_hoverable', 'is_hovered', 'is_selected', 'is_flipped'
+    )
+
+    # Corners of the artwork relative to the center of the card, before it is rotated
+    TOP_LEFT = (int(23 * CARD_SIZE / 128) - CARD_SIZE // 2, int(4 * CARD_SIZE / 128) - CARD_SIZE // 2)
+    TOP_RIGHT = (int(106 * CARD_SIZE / 128) - CARD_SIZE // 2, int(4 * CARD_SIZE / 128) - CARD_SIZE // 2)
+    BOTTOM_LEFT = (int(23 * CARD_SIZE / 128) - CARD_SIZE // 2, int(124 * CARD_SIZE / 128) - CARD_SIZE // 2)
+    BOTTOM_RIGHT = (int(106 * CARD_SIZE / 128) - CARD_SIZE // 2, int(124 * CARD_SIZE / 128) - CARD_SIZE // 2)
+
+    text = ''
+    font_color = (0, 0, 0, 0)
+
+    def __init__(self, rank, suit, back_path=CARD_BACK_PATH):
+        self.face = get_card_face(rank, suit, back_path)
+        self.reset()
+
+    def reset(self):
+        # Back to how a new card starts out: face down, upright, at the origin and neither hovered nor selected
         self.angle = 0
+        self._image = self.face.image
+        self._back_image = self.face.back_image
+
+        self.rect = self._image.get_rect()
+        self.polygon = None  # Corners of the card on screen, computed by `collides_with` after every `set_at`
 
         self.is_visible = True
         self.is_hoverable = True
         self.is_hovered = False
         self.is_selected = False
         self.is_flipped = False
-        self.is_flipping = False
         self.z_index = 10
-        self.text = ''
-        self.font_color = (0, 0, 0, 0)
+
+    @property
+    def rank(self) -> int:
+        return self.face.rank
+
+    @property
+    def suit(self) -> int:
+        return self.face.suit
+
+    @property
+    def code(self) -> int:
+        return self.face.code
+
+    @property
+    def center(self):
+        return self.rect.center
+
+    # """
+    # Both sides are rotated lazily: `set_at` only rotates the side on show and leaves the other one as None, which is
+    # filled in from the rotation cache the first time it is asked for (e.g. when the card gets flipped over).
+    # """
+    @property
+    def image(self):
+        if self._image is None:
+            self._image = rotate_image(self.face.image, self.angle)
+        return self._image
+
+    @image.setter
+    def image(self, image):
+        self._image = image
+
+    @property
+    def back_image(self):
+        if self._back_image is None:
+            self._back_image = rotate_image(self.face.back_image, self.angle)
+        return self._back_image
+
+    @back_image.setter
+    def back_image(self, image):
+        self._back_image = image
 
     def is_numerical(self):
         return RANK_A <= self.rank <= RANK_10
@@ -106,49 +154,37 @@ class Card:
             self.is_selected = False
 
     def get_hovered_params(self):
-        self.hovered_image = self.image.copy()
-        self.hovered_image.fill((255, 255, 0, 255), special_flags=pygame.BLEND_MULT)
-
-        hovered_image = self.hovered_image
-        if not self.is_flipped:
-            hovered_image = self.back_image.copy()
-            hovered_image.fill((255, 255, 0, 255), special_flags=pygame.BLEND_MULT)
+        hovered_image = tint_image(self.get_image(), HOVERED_TINT)
         return hovered_image, self.rect, hovered_image, self.rect, self.text
 
     def get_clicked_params(self):
-        self.clicked_image = self.image.copy()
-        self.clicked_image.fill((0, 255, 0, 255), special_flags=pygame.BLEND_MULT)
-
-        clicked_image = self.clicked_image
-        if not self.is_flipped:
-            clicked_image = self.back_image.copy()
-            clicked_image.fill((0, 255, 0, 255), special_flags=pygame.BLEND_MULT)
+        clicked_image = tint_image(self.get_image(), CLICKED_TINT)
         return clicked_image, self.rect, clicked_image, self.rect, self.text
 
     def set_at(self, center_x, center_y, angle):
-        self.image = pygame.transform.rotate(self.original_image, angle)
-        self.back_image = pygame.transform.rotate(self.original_back_image, angle)
-        self.rect = self.image.get_rect()
-        self.rect.center = center_x, center_y
-        self.center = center_x, center_y
-
-        # self.hovered_image = self.image.copy()
-        # self.hovered_image.fill((255, 255, 0, 255), special_flags=pygame.BLEND_MULT)
-        #
-        # self.clicked_image = self.image.copy()
-        # self.clicked_image.fill((0, 255, 0, 255), special_flags=pygame.BLEND_MULT)
-
         self.angle = angle
+        if self.is_flipped:
+            self.image, self.back_image = rotate_image(self.face.image, angle), None
+        else:
+            self.image, self.back_image = None, rotate_image(self.face.back_image, angle)
+        self.rect = self.get_image().get_rect()
+        self.polygon = None
+        self.rect.center = center_x, center_y
 
     def collides_with(self, x, y):
         if not self.rect.collidepoint(x, y):
             return False
 
-        vertices = [self.top_left, self.top_right, self.bottom_right, self.bottom_left]
-        radians = math.radians(self.angle)
-        sin, cos = math.sin(radians), math.cos(radians)
-        vxs = [cx * cos + cy * sin + self.center[0] for cx, cy in vertices]
-        vys = [-cx * sin + cy * cos + self.center[1] for cx, cy in vertices]
+        if self.polygon is None:
+            vertices = [self.TOP_LEFT, self.TOP_RIGHT, self.BOTTOM_RIGHT, self.BOTTOM_LEFT]
+            radians = math.radians(self.angle)
+            sin, cos = math.sin(radians), math.cos(radians)
+            center_x, center_y = self.rect.center
+            self.polygon = (
+                [cx * cos + cy * sin + center_x for cx, cy in vertices],
+                [-cx * sin + cy * cos + center_y for cx, cy in vertices]
+            )
+        vxs, vys = self.polygon
 
         is_inside = False
         j = len(vxs) - 1
@@ -164,17 +200,12 @@ class Card:
         return self.image if self.is_flipped else self.back_image
 
     def set_image(self, image):
+        # Only the flip animation draws a card with an image of its own, the next `set_at` puts the face back
         if self.is_flipped:
             self.image = image
         else:
             self.back_image = image
 
-        self.hovered_image = self.get_image().copy()
-        self.hovered_image.fill((255, 255, 0, 255), special_flags=pygame.BLEND_MULT)
-
-        self.clicked_image = self.get_image().copy()
-        self.clicked_image.fill((0, 255, 0, 255), special_flags=pygame.BLEND_MULT)
-
     def dump(self):
         return [self]
 
@@ -188,32 +219,42 @@ class Card:
         return f'{RANK_NAMES[self.rank - 1]} {SUIT_NAMES[self.suit - 1]}'
 
 
-class PlaceholderCard(Card):
+class CardPool:
+    # """
+    # Cards of finished games, kept to be dealt again. `take` hands out a reset card of the requested face and only
+    # creates one when none is free, `give_back` takes back the cards of a scene that is done with them. Back-to-back
+    # games deal the same card objects over and over instead of allocating (and dropping) two full decks each time.
+    # """
     def __init__(self):
-        super().__init__(RANK_A, SUIT_CLUBS)
-        self.original_back_image = pygame.image.load('assets/cards/card_empty_outline.png').convert_alpha()
-        self.original_back_image = pygame.transform.scale(self.original_back_image, (CARD_SIZE, CARD_SIZE))
+        self.free: dict[int, list[Card]] = {}  # code -> unused cards with that face
+        self.lock = threading.Lock()  # Game scenes are built on a background worker, see `states.scene_executor`
 
-        self.back_image = self.original_back_image.copy()
+    def take(self, rank, suit):
+        with self.lock:
+            free = self.free.get(make_card(rank, suit))
+            card = free.pop() if free else None
+        if card is None:
+            return Card(rank, suit)
+        card.reset()
+        return card
 
-        self.original_hovered_image = pygame.image.load('assets/cards/card_empty.png').convert_alpha()
-        self.hovered_image = self.original_hovered_image.copy()
-        self.hovered_image = pygame.transform.scale(self.hovered_image, (CARD_SIZE, CARD_SIZE))
-        self.hovered_image.fill((255, 255, 0, 255), special_flags=pygame.BLEND_MULT)
+    def give_back(self, cards):
+        with self.lock:
+            for card in cards:
+                self.free.setdefault(card.code, []).append(card)
 
-        self.clicked_image = self.image.copy()
-        self.clicked_image.fill((0, 255, 0, 255), special_flags=pygame.BLEND_MULT)
 
-    def get_hovered_params(self):
-        return self.hovered_image, self.rect, self.hovered_image, self.rect, self.text
+card_pool = CardPool()
 
-    def set_at(self, center_x, center_y, angle):
-        self.image = pygame.transform.rotate(self.original_image, angle)
-        self.back_image = pygame.transform.rotate(self.original_back_image, angle)
-        self.hovered_image = pygame.transform.scale(self.original_hovered_image, (CARD_SIZE, CARD_SIZE))
-        self.hovered_image = pygame.transform.rotate(self.hovered_image, angle)
-        self.hovered_image.fill((255, 255, 0, 255), special_flags=pygame.BLEND_MULT)
-        self.rect = self.image.get_rect()
-        self.rect.center = center_x, center_y
-        self.center = center_x, center_y
-        self.angle = angle
+
+class PlaceholderCard(Card):
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(RANK_A, SUIT_CLUBS, 'assets/cards/card_empty_outline.png')
+
+    def get_hovered_params(self):
+        hovered_image = tint_image(
+            rotate_image(load_image('assets/cards/card_empty.png', (CARD_SIZE, CARD_SIZE)), self.angle), HOVERED_TINT
+        )
+        return hovered_image, self.rect, hovered_image, self.rect, self.text
@@ -1,34 +1,75 @@
 from cards import *
-from graphics import WINDOW_WIDTH, WINDOW_HEIGHT
+from graphics import WINDOW_WIDTH, WINDOW_HEIGHT, render_list
+import rules
+from rules import DESC, UNDEFINED, ASC, MIN_CARAVAN_THRESHOLD, MAX_CARAVAN_THRESHOLD, NO_LAYER, CaravanState
 import numpy as np
 import random
 
 
-DESC = -1
-UNDEFINED = 0
-ASC = 1
+class CardIndex:
+    # """
+    # Where every card on the table lies: card -> (deck, layer, slot). Layer and slot only mean something in caravans,
+    # slot 0 being the numerical card of the layer and the face cards following it, other decks file their cards under
+    # NO_LAYER. Decks attached with `track` keep the index up to date on every change, the throwaway decks built for
+    # animations are never tracked.
+    # """
+    def __init__(self):
+        self.locations: dict[Card, tuple[Deck, int, int]] = {}
 
-MIN_CARAVAN_THRESHOLD = 21
-MAX_CARAVAN_THRESHOLD = 26
+    def track(self, deck):
+        deck.index = self
+        deck.reindex()
+
+    def place(self, card, deck, layer=NO_LAYER, slot=0):
+        self.locations[card] = deck, layer, slot
+
+    def discard(self, card, deck):
+        location = self.locations.get(card)
+        if location is not None and location[0] is deck:  # The card may already have been placed somewhere else
+            del self.locations[card]
+
+    def locate(self, card):
+        return self.locations.get(card)
+
+    def deck_of(self, card):
+        location = self.locations.get(card)
+        return location[0] if location is not None else None
 
 
 class Deck:
     def __init__(self, cards):
         self.cards: list[Card] = cards
+        self.index: CardIndex = None  # Set by `CardIndex.track`
 
         self.is_hoverable = True
 
+    def reindex(self):
+        for card in self.cards:
+            self.index.place(card, self)
+
     def add_card(self, card):
         if self.cards:
             card.z_index = max(self.cards[-1].z_index + 1, card.z_index)
         self.cards.append(card)
+        if self.index is not None:
+            self.index.place(card, self)
 
     def contains(self, card):
+        if self.index is not None:
+            return self.index.deck_of(card) is self
         return any(card == s_card for s_card in self.cards)
 
     def remove_card(self, card):
         if self.contains(card):
             self.cards.remove(card)
+            if self.index is not None:
+                self.index.discard(card, self)
+
+    def pop_card(self, i=0):
+        card = self.cards.pop(i)
+        if self.index is not None:
+            self.index.discard(card, self)
+        return card
 
     def hover(self, x, y):
         for card in self.cards:
@@ -38,7 +79,7 @@ class Deck:
         for reset_card in self.cards:
             reset_card.is_selected = False
 
-        z_cards = sort_cards_by_z_index(self.cards)
+        z_cards = render_list.top_down(self.cards) or sort_cards_by_z_index(self.cards)
         for card in z_cards:
             if card.collides_with(x, y) and card.is_hoverable:
                 card.click(x, y)
@@ -98,10 +139,11 @@ def generate_all_cards():
 
 
 def generate_random_cards(num_cards=None):
-    deck = generate_all_cards()
+    # Only the cards drawn are created, creating a card loads its art
+    deck = list(card_image_paths)
     assert num_cards <= len(deck)
     random.shuffle(deck)
-    return deck[:num_cards]
+    return [Card(rank, suit) for rank, suit in deck[:num_cards]]
 
 
 def generate_player_1_hand_cards(num_cards: int = 5, cards=None):
@@ -196,36 +238,39 @@ class Caravan(Deck):
         self.player = player
         self.caravan = caravan
         self.layers: list[list[Card, list[Card]]] = []
+        self.state = CaravanState()  # Rules-side mirror of `layers`, every rule is evaluated on it
         self.value = 0
         self.suit = UNDEFINED
         self.direction = UNDEFINED
 
+    def reindex(self):
+        self.index.place(self.cards[0], self)  # The placeholder
+        for i, (layer_card, adjacents) in enumerate(self.layers):
+            self.index.place(layer_card, self, i, 0)
+            for j, adj in enumerate(adjacents, 1):
+                self.index.place(adj, self, i, j)
+
+    def find_layer(self, card: Card):
+        if self.index is not None:
+            location = self.index.locate(card)
+            return location[1] if location is not None and location[0] is self else NO_LAYER
+        for i, (layer_card, adjacents) in enumerate(self.layers):
+            if card == layer_card or card in adjacents:
+                return i
+        return NO_LAYER
+
     def calculate_value(self):
-        return sum([card.rank * 2 ** len([card for card in adjacents if card.rank == RANK_K]) for card, adjacents in self.layers])
+        return self.state.value
 
     def calculate_suit(self):
-        if not self.layers:
-            return UNDEFINED
-        card, adjacents = self.layers[-1]
-        suit = card.suit
-        for adj in adjacents:
-            if adj.rank == RANK_Q:
-                suit = adj.suit
-        return suit
+        return self.state.suit
 
     def calculate_direction(self):
-        if len(self.layers) <= 1:
-            return UNDEFINED
-        card_1 = self.layers[-2][0]
-        card_2, adjacents = self.layers[-1]
-        if card_1.rank >= card_2.rank:
-            direction = DESC  # Yes, if the last two cards have the same rank, FNV considers the caravan as decreasing
-        else:
-            direction = ASC
-        for adj in adjacents:
-            if adj.rank == RANK_Q:
-                direction *= -1
-        return direction
+        return self.state.direction
+
+    def subscribe(self, callback):
+        # Call `callback(self)` whenever the value, suit or direction of the caravan may have changed
+        self.state.subscribe(lambda state: callback(self))
 
     def add_card_on(self, card: Card, on_top_of_card: Card):
         if not self.layers:
@@ -237,41 +282,20 @@ class Caravan(Deck):
 
         self.cards.append(card)
 
+        layer = self.find_layer(on_top_of_card)
         if card.is_numerical():
             self.layers.append([card, []])
-            self.value += card.rank
-        if card.is_face():
-            for i, (layer_card, adjacents) in enumerate(self.layers):
-                if layer_card == on_top_of_card or on_top_of_card in adjacents:
-                    adjacents.append(card)
-                    break
+            if self.index is not None:
+                self.index.place(card, self, len(self.layers) - 1, 0)
+        elif layer != NO_LAYER:
+            self.layers[layer][1].append(card)
+            if self.index is not None:
+                self.index.place(card, self, layer, len(self.layers[layer][1]))
+        self.state.add_card_on(card.code, layer)
         self.update()
 
     def check_if_move_is_valid(self, card: Card, on_top_of_card: Card):
-        if card.is_numerical():
-            if len(self.layers) == 0:
-                return True  # Numerical card can be placed on an empty caravan
-            elif len(self.layers) >= 7:
-                return False  # Numerical card can't be placed on a caravan with max capacity
-            elif (layer_card := self.layers[-1][0]) == on_top_of_card or on_top_of_card in self.layers[-1][1]:
-                if (
-                        (layer_card.rank > card.rank and self.direction != ASC)
-                        or (layer_card.rank < card.rank and self.direction != DESC)
-                ):
-                    return True  # Numerical card follows caravan order (direction) and can be placed on the caravan
-                elif card.suit == self.suit and card.rank != layer_card.rank:
-                    return True  # Numerical card matches the suit of the caravan and can be placed on it
-                else:
-                    return False  # Numerical card can't be placed on caravan as it doesn't follow caravan order (direction) nor matches the caravan suit
-            else:
-                return False  # Numerical card can't be placed in the middle of the deck, must be placed as the last card
-        if card.is_face():
-            for layer_card, adjacents in self.layers:
-                if on_top_of_card == layer_card or on_top_of_card in adjacents:
-                    if len(adjacents) >= 3 and card.rank != RANK_J:
-                        return False  # Face card can't be placed on selected card with max capacity of face cards
-                    return True  # Face card can be placed on selected card
-        return False  # Face card can't be placed on an empty caravan
+        return self.state.check_if_move_is_valid(card.code, self.find_layer(on_top_of_card))
 
     def update(self):
         for i, (layer_card, adjacents) in enumerate(self.layers):
@@ -287,20 +311,24 @@ class Caravan(Deck):
         self.direction = self.calculate_direction()
 
     def remove_card(self, card):
-        for i, (layer_card, adjacents) in enumerate(self.layers):
-            if card == layer_card or card in adjacents:
-                self.layers.pop(i)
-                self.cards.remove(layer_card)
-                for adj in adjacents:
-                    self.cards.remove(adj)
-                break
+        layer = self.find_layer(card)
+        if layer != NO_LAYER:
+            layer_card, adjacents = self.layers.pop(layer)
+            self.state.remove_layer(layer)
+            self.cards.remove(layer_card)
+            for adj in adjacents:
+                self.cards.remove(adj)
+            if self.index is not None:
+                for removed in (layer_card, *adjacents):
+                    self.index.discard(removed, self)
+                self.reindex()  # The layers above moved down
         self.update()
     
     def click(self, x, y):
         for reset_card in self.cards:
             reset_card.is_selected = False
 
-        z_cards = sort_cards_by_z_index(self.cards)
+        z_cards = render_list.top_down(self.cards) or sort_cards_by_z_index(self.cards)
         for card in z_cards:
             if card.collides_with(x, y) and card.is_hoverable:
                 card.click(x, y)
@@ -322,10 +350,9 @@ def generate_starting_caravan(player: int = 1, caravan: str = 'A'):
 
 
 def generate_valid_player_and_drawing_deck(num_cards: int = 54):
-    cards = generate_all_cards()[:num_cards]
-    numeric = list(random.sample(cards[:40], 3))
-    cards = [card for card in cards if card not in numeric]
-    random.shuffle(cards)
-    res = numeric + cards[:5], cards[5:]
+    hand_codes, draw_codes = rules.generate_valid_player_and_drawing_deck(num_cards)
+    return [card_from_code(code) for code in hand_codes], [card_from_code(code) for code in draw_codes]
 
-    return res
+
+def card_from_code(code: int):
+    return card_pool.take(rules.rank_of(code), rules.suit_of(code))
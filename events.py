@@ -0,0 +1,30 @@
+import pygame
+
+
+# """
+# The event queue is polled once per frame, by `poll`. Every event goes to the callbacks subscribed to its type right
+# away (window resizes) and is kept for the rest of the frame under its type, where the current state reads its clicks
+# and keys with `get`. Nothing is ever posted back to the queue: whatever nobody wanted is dropped with the frame.
+# """
+subscribers: dict[int, list] = {}  # event type -> callbacks, called in the order they subscribed
+frame_events: dict[int, list[pygame.event.Event]] = {}  # event type -> events of this frame
+
+
+def subscribe(event_type, callback):
+    subscribers.setdefault(event_type, []).append(callback)
+
+
+def poll():
+    frame_events.clear()
+    for event in pygame.event.get():
+        frame_events.setdefault(event.type, []).append(event)
+        for callback in subscribers.get(event.type, []):
+            callback(event)
+
+
+def get(event_type):
+    return frame_events.get(event_type, [])
+
+
+def get_released_keys():
+    return [event.key for event in get(pygame.KEYUP)]
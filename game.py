@@ -1,5 +1,6 @@
 import pygame
 import graphics
+import events
 from states import Context
 
 
@@ -11,7 +12,7 @@ def start():
     while context.is_running():  # game loop
 
         # handle events and update state
-        graphics.handle_events()
+        events.poll()
         context.handle_events()
 
         # update display
@@ -1,6 +1,8 @@
 import pygame
-from pygame.locals import QUIT
 import math
+from collections import Counter
+from resources import load_image, render_text
+import events
 
 
 # Display surface
@@ -14,61 +16,137 @@ WINDOW_FLAGS = pygame.RESIZABLE | pygame.DOUBLEBUF | 0
 BG_COLOR = (255, 150, 0)
 TEXT_COLOR = (0, 0, 0)
 
-BACKGROUND_IMAGE = pygame.transform.scale(pygame.image.load('assets/backgrounds/background.png'), (WINDOW_WIDTH, WINDOW_HEIGHT))
-BUTTON_IMAGE = pygame.image.load('assets/backgrounds/button.png')
+FONT_PATH = 'assets/fonts/THE_FONT.ttf'
+FONT_SIZE = 26
+
+BACKGROUND_IMAGE: pygame.Surface = ...  # Loaded by `init`, once there is a window to convert it for
 
 clock = pygame.time.Clock()
 FPS = 80
 
+# Dirty rectangle rendering
+previous_frame: list | None = None  # Blits of the last frame drawn, None forcing the next frame to be drawn whole
+effects: list = []  # Immediate drawing queued with `draw_effect` for the next frame
+previous_effects = False
+
+wipe = None  # Scene transition in progress, see `Wipe`
+
+is_music_pending = False
+
 
 def init():
-    global display_surf
+    global display_surf, BACKGROUND_IMAGE, is_music_pending
     display_surf = pygame.display.set_mode(
         size=(WINDOW_WIDTH, WINDOW_HEIGHT),
         flags=WINDOW_FLAGS
     )
     pygame.display.set_caption('Caravan')
-    pygame.display.set_icon(pygame.image.load('assets/cards/card_red_joker.png'))
+    pygame.display.set_icon(load_image('assets/cards/card_red_joker.png'))
+    BACKGROUND_IMAGE = load_image('assets/backgrounds/background.png', (WINDOW_WIDTH, WINDOW_HEIGHT))
+
+    events.subscribe(pygame.VIDEORESIZE, resize)
 
     pygame.mixer.init()
+    is_music_pending = True  # Started by `display` once the first frame is on screen
+
+
+def start_music():
     pygame.mixer.music.load('assets/music/Smash Sketch.mp3')
     pygame.mixer.music.play(loops=-1)
     pygame.mixer.music.set_volume(0.1)
 
 
-def handle_events():
-    global WINDOW_WIDTH, WINDOW_HEIGHT, display_surf
+def resize(event):
+    global WINDOW_WIDTH, WINDOW_HEIGHT, display_surf, previous_frame
 
-    for event in pygame.event.get():
-        if event.type == pygame.VIDEORESIZE:
-            new_width = max(round(event.w, -2), 600)
-            new_height = max(round(event.h, -2), 400)
-            WINDOW_WIDTH, WINDOW_HEIGHT = new_width, new_height
-            display_surf = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), flags=WINDOW_FLAGS)
-        else:
-            pygame.event.post(event)
+    new_width = max(round(event.w, -2), 600)
+    new_height = max(round(event.h, -2), 400)
+    WINDOW_WIDTH, WINDOW_HEIGHT = new_width, new_height
+    display_surf = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), flags=WINDOW_FLAGS)
+    previous_frame = None
 
 
 def display(state):
-    global display_surf
-    old_surface = display_surf.copy()
-
-    # display_surf.fill(BG_COLOR)
-    display_surf.blit(BACKGROUND_IMAGE, BACKGROUND_IMAGE.get_rect())
+    global display_surf, previous_frame, previous_effects, wipe, is_music_pending
+    if state.transition:
+        state.transition = False
+        start_transition(state)
 
-    font = pygame.font.Font('assets/fonts/THE_FONT.ttf', size=26)
     # surf = font.render(f'{state}', True, (255, 0, 255), (40, 40, 40))
     # display_surf.blit(surf, (20, 20))
 
-    for animation in state.animations[:]:
+    if wipe is not None and wipe.is_closing():
+        # The new scene waits behind the closing wipe, its objects are still picked for hovering and clicking
+        build_frame(state)
+        display_surf.blit(wipe.old_surface, (0, 0))
+        wipe.draw(display_surf)
+        previous_frame = None
+        pygame.display.update()
+        clock.tick(FPS)
+        return
+
+    # Animations added while stepping the others start on the next frame
+    stepped = len(state.animations)
+    running = []
+    for animation in state.animations[:stepped]:
         objects = next(animation, {})
+        if objects:
+            running.append(animation)
+            state.objects.update(objects)
+    state.animations[:stepped] = running
+
+    frame = build_frame(state)
+
+    if previous_frame is None or effects or previous_effects:
+        # Effects are drawn straight onto the screen, there is nothing to diff them against
+        display_surf.blit(BACKGROUND_IMAGE, BACKGROUND_IMAGE.get_rect())
+        for draw, args in effects:
+            draw(display_surf, *args)
+        for image, rect, _ in frame:
+            display_surf.blit(image, rect)
+        dirty_rects = None
+    else:
+        # Counted, not just compared as sets: an object listed twice is blitted twice, which shows on translucent images
+        previous_blits, blits = Counter(previous_frame), Counter(frame)
+        changed = (previous_blits - blits) + (blits - previous_blits)
+        dirty_rects = merge_rects([pygame.Rect(rect) for _, rect, _ in changed])
+        for dirty_rect in dirty_rects:
+            display_surf.set_clip(dirty_rect)
+            display_surf.blit(BACKGROUND_IMAGE, BACKGROUND_IMAGE.get_rect())
+            for image, rect, _ in frame:
+                if dirty_rect.colliderect(rect):
+                    display_surf.blit(image, rect)
+        display_surf.set_clip(None)
+
+    previous_frame = frame
+    previous_effects = bool(effects)
+    effects.clear()
+
+    if wipe is not None:
+        # The new scene runs while the wipe opens over it
+        if wipe.draw(display_surf):
+            previous_frame = None  # The wipe drew over the frame
+            dirty_rects = None
+        else:
+            wipe = None
+
+    if dirty_rects is None:
+        pygame.display.update()
+    elif dirty_rects:
+        pygame.display.update(dirty_rects)
+    if is_music_pending:
+        is_music_pending = False
+        start_music()
+    clock.tick(FPS)
 
-        if not objects:
-            state.animations.remove(animation)
-            continue
 
-        for key, val in objects.items():
-            state.objects[key] = val
+def build_frame(state):
+    # """
+    # Everything to draw this frame, in order, as (image, (x, y, w, h), z) blits. Comparing two frames tells exactly
+    # what changed on screen: a blit in only one of them means its rect has to be redrawn. Images are shared surfaces
+    # (see `resources`), nothing draws on them, so the same surface at the same place always looks the same.
+    # """
+    frame = []
 
     currently_hovered = None
     currently_selected = None
@@ -78,12 +156,9 @@ def display(state):
         if object.is_selected:
             currently_selected = object
 
-        display_surf.blit(object.get_image(), object.rect)
-
-        text_surf = font.render(object.text, True, object.font_color).convert_alpha()
-        rect = text_surf.get_rect()
-        rect.center = object.rect.center
-        display_surf.blit(text_surf, rect)
+        image = object.get_image()
+        frame.append((image, blit_area(image, object.rect), object.z_index))
+        add_text(frame, object.text, object.font_color, object.rect.center, object.z_index)
 
     if currently_hovered == currently_selected and currently_hovered:
         currently_hovered = None
@@ -91,87 +166,204 @@ def display(state):
     if currently_selected:
         selected_image, selected_image_rect, image, image_rect, text = currently_selected.get_clicked_params()
 
-        display_surf.blit(selected_image, selected_image_rect)
-        display_surf.blit(image, image_rect)
+        frame.append((selected_image, blit_area(selected_image, selected_image_rect), math.inf))
+        frame.append((image, blit_area(image, image_rect), math.inf))
 
-        text_surf = font.render(currently_selected.text, True, currently_selected.font_color).convert_alpha()
-        rect = text_surf.get_rect()
-        rect.center = image_rect.center
-        display_surf.blit(text_surf, rect)
+        add_text(frame, currently_selected.text, currently_selected.font_color, image_rect.center, math.inf)
     if currently_hovered:
         hovered_image, hovered_image_rect, image, image_rect, text = currently_hovered.get_hovered_params()
 
-        display_surf.blit(hovered_image, hovered_image_rect)
-        display_surf.blit(image, image_rect)
+        frame.append((hovered_image, blit_area(hovered_image, hovered_image_rect), math.inf))
+        frame.append((image, blit_area(image, image_rect), math.inf))
 
-        text_surf = font.render(currently_hovered.text, True, currently_hovered.font_color).convert_alpha()
-        rect = text_surf.get_rect()
-        rect.center = image_rect.center
-        display_surf.blit(text_surf, rect)
+        add_text(frame, currently_hovered.text, currently_hovered.font_color, image_rect.center, math.inf)
 
-    new_surface = display_surf.copy()
+    return frame
 
-    if state.transition:
-        state.transition = False
-        if state.audible:
-            pygame.mixer.music.fadeout(100)
-            if 'TitleScreen' in str(type(state)):
-                pygame.mixer.music.load('assets/music/Smash Sketch.mp3')
-                pygame.mixer.music.set_volume(.1)
-            elif 'StandardMode' in str(type(state)):
-                pygame.mixer.music.load('assets/music/Thief in the Night (Standard).mp3')
-                pygame.mixer.music.set_volume(.3)
-            elif 'PvPMode' in str(type(state)):
-                pygame.mixer.music.load('assets/music/Walking Along (PvP).mp3')
-                pygame.mixer.music.set_volume(.7)
-        
-        display_transition_animation(old_surface, new_surface, state.audible)
-        return
 
-    pygame.display.update()
-    clock.tick(FPS)
+def add_text(frame, text, color, center, z_index):
+    if not text:  # Most objects are cards, which have no text at all
+        return
+    text_surf = render_text(text, FONT_PATH, FONT_SIZE, color)
+    rect = text_surf.get_rect()
+    rect.center = center
+    frame.append((text_surf, blit_area(text_surf, rect), z_index))
+
+
+def blit_area(image, rect):
+    # Blitting only uses the top left corner of `rect`, the image may well be larger (or smaller) than the rect
+    return rect[0], rect[1], *image.get_size()
+
+
+def merge_rects(rects):
+    # Overlapping rects are joined, so no area gets redrawn twice
+    merged = []
+    for rect in rects:
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect = rect.union(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+def draw_effect(draw, *args):
+    # Queue `draw(display_surf, *args)` (e.g. `pygame.draw.circle`) for the next frame, under every object
+    effects.append((draw, args))
+
+
+CELL_SIZE = 64
+
+
+class RenderList:
+    # """
+    # Every drawable of the scene in drawing order (by z_index, ties in `objects` order), kept from frame to frame. A
+    # frame only checks whether a drawable came, went, changed its z_index or its visibility, the list is sorted again
+    # only then. Hit-testing walks the same list from the top down, so a click lands on the card drawn on top.
+    # """
+    def __init__(self):
+        self.signature = None
+        self.ordered = []  # Bottom to top, hidden drawables included
+        self.visible = []
+
+        # Uniform grid over the visible drawables, for picking what is under the mouse
+        self.layout = None
+        self.cells: dict[tuple[int, int], list] = {}  # (column, row) -> drawables overlapping the cell, bottom to top
+        self.version = 0  # Bumped every time the grid is rebuilt
+
+    def update(self, objects):
+        drawables = [drawable for object in objects.values() for drawable in object.dump()]
+        signature = [(drawable, drawable.z_index, drawable.is_visible) for drawable in drawables]
+        if signature != self.signature:
+            self.signature = signature
+            self.ordered = sorted(drawables, key=lambda drawable: drawable.z_index)
+            self.visible = [drawable for drawable in self.ordered if drawable.is_visible]
+
+        layout = [(drawable, tuple(drawable.rect), drawable.is_hoverable) for drawable in self.visible]
+        if layout != self.layout:
+            self.layout = layout
+            self.cells = {}
+            for drawable in self.visible:
+                left, top, width, height = drawable.rect
+                for column in range(left // CELL_SIZE, (left + width - 1) // CELL_SIZE + 1):
+                    for row in range(top // CELL_SIZE, (top + height - 1) // CELL_SIZE + 1):
+                        self.cells.setdefault((column, row), []).append(drawable)
+            self.version += 1
+        return self.visible
+
+    def pick(self, x, y):
+        # Top-most hoverable drawable under (x, y), only the drawables in that one cell are tested
+        for drawable in reversed(self.cells.get((x // CELL_SIZE, y // CELL_SIZE), ())):
+            if drawable.is_hoverable and drawable.collides_with(x, y):
+                return drawable
+        return None
+
+    def top_down(self, cards):
+        # `cards` from the top down as last drawn, or None if some of them weren't part of the last frame
+        members = set(cards)
+        result = [drawable for drawable in reversed(self.ordered) if drawable in members]
+        return result if len(result) == len(members) else None
+
+
+render_list = RenderList()
 
 
 def get_visible_objects(objects):
-    result = []
-    for object in objects.values():
-        result.extend(object.dump())
-    result = [object for object in result if object.is_visible]
-    return sorted(result, key=lambda x: x.z_index)
-
-
-def display_transition_animation(old_surface, new_surface, audible):
-    box_width = 50
+    return render_list.update(objects)
+
+
+def start_transition(state):
+    global wipe, previous_frame
+    wipe = Wipe(display_surf.copy(), state.audible)  # Still showing the last frame of the old scene
+    previous_frame = None
+    if state.audible:
+        pygame.mixer.music.fadeout(100)
+        if 'TitleScreen' in str(type(state)):
+            pygame.mixer.music.load('assets/music/Smash Sketch.mp3')
+            pygame.mixer.music.set_volume(.1)
+        elif 'StandardMode' in str(type(state)):
+            pygame.mixer.music.load('assets/music/Thief in the Night (Standard).mp3')
+            pygame.mixer.music.set_volume(.3)
+        elif 'PvPMode' in str(type(state)):
+            pygame.mixer.music.load('assets/music/Walking Along (PvP).mp3')
+            pygame.mixer.music.set_volume(.7)
+
+
+WIPE_BOX_WIDTH = 50
+WIPE_STEP_MS = 1000 / (FPS * 6)  # The wipe advances one step (a degree of a box's swing) this often
+WIPE_PAUSE_MS = 200  # Time the screen stays covered between the old scene and the new one
+WIPE_COLOR = (128, 0, 0)
+wipe_polygons_cache: dict[tuple[int, int], list] = {}
+
+
+def wipe_polygons(width, height):
+    # """
+    # Every shape of the wipe for a window size: polygons[box][i] is the box `box` swung by `i` degrees, 90 meaning
+    # fully shut. Computed once per window size.
+    # """
+    polygons = wipe_polygons_cache.get((width, height))
+    if polygons is not None:
+        return polygons
     coords = []
     for angle_offset in range(0, 91, 1):
         angle = math.radians(90 + angle_offset)
-        x, y = box_width // 2 * math.cos(angle), box_width // 2 * math.sin(angle)
+        x, y = WIPE_BOX_WIDTH // 2 * math.cos(angle), WIPE_BOX_WIDTH // 2 * math.sin(angle)
         coord = [
             (x, y),
             (-x, -y),
-            (-x, WINDOW_HEIGHT - y),
-            (x, WINDOW_HEIGHT + y)
+            (-x, height - y),
+            (x, height + y)
         ]
         coords.append(coord)
-
-    for ts in [range(60 + WINDOW_WIDTH // box_width * 30), range(60 + WINDOW_WIDTH // box_width * 30, -1, -1)]:
-        for t in ts:
-            display_surf.blit(old_surface, (0, 0))
-            for box in range(WINDOW_WIDTH // box_width):
-                pygame.event.get()
-                if t <= 30 * box:
-                    continue
-                if t >= 30 * box + 90:
-                    index = 90
-                else:
-                    index = (t - 30 * box) % 90
-                boxx = box_width // 2 + box * box_width
-                box_coords = [(boxx + x, y) for x, y in coords[index]]
-                pygame.draw.polygon(display_surf, (128, 0, 0), box_coords)
-            pygame.display.update()
-            clock.tick(FPS * 6)
-        if ts != range(60 + WINDOW_WIDTH // box_width * 30, -1, -1):
-            if audible:
+    polygons = wipe_polygons_cache[(width, height)] = [
+        [[(WIPE_BOX_WIDTH // 2 + box * WIPE_BOX_WIDTH + x, y) for x, y in coord] for coord in coords]
+        for box in range(width // WIPE_BOX_WIDTH)
+    ]
+    return polygons
+
+
+class Wipe:
+    # """
+    # Scene transition: columns of boxes swing shut over the last frame of the old scene, stay shut for a moment, then
+    # swing open over the new scene. It is timed on the clock and drawn one frame at a time by `display`, so the game
+    # loop, input and music all keep running meanwhile.
+    # """
+    def __init__(self, old_surface, audible):
+        self.old_surface = old_surface
+        self.audible = audible
+        self.started = pygame.time.get_ticks()
+        self.is_open = False  # Whether the new scene has been revealed yet
+
+    def steps(self):
+        return 60 + WINDOW_WIDTH // WIPE_BOX_WIDTH * 30
+
+    def progress(self):
+        # Wipe step for this frame (0 is open, `steps()` is shut), None once the wipe is over
+        elapsed = pygame.time.get_ticks() - self.started
+        closing_ms = self.steps() * WIPE_STEP_MS
+        if elapsed < closing_ms:
+            return int(elapsed / WIPE_STEP_MS)
+        if elapsed < closing_ms + WIPE_PAUSE_MS:
+            return self.steps()
+        if elapsed < 2 * closing_ms + WIPE_PAUSE_MS:
+            return self.steps() - int((elapsed - closing_ms - WIPE_PAUSE_MS) / WIPE_STEP_MS)
+        return None
+
+    def is_closing(self):
+        elapsed = pygame.time.get_ticks() - self.started
+        return elapsed < self.steps() * WIPE_STEP_MS + WIPE_PAUSE_MS
+
+    def draw(self, surface):
+        # Draw the boxes for this frame, returns False once the wipe is over
+        t = self.progress()
+        if t is None:
+            return False
+        if not self.is_open and not self.is_closing():
+            self.is_open = True
+            if self.audible:
                 pygame.mixer.music.play(loops=-1)
-        pygame.time.wait(200)
-        old_surface = new_surface
+        for box, polygons in enumerate(wipe_polygons(WINDOW_WIDTH, WINDOW_HEIGHT)):
+            if t <= 30 * box:
+                continue
+            pygame.draw.polygon(surface, WIPE_COLOR, polygons[min(t - 30 * box, 90)])
+        return True
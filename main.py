@@ -1,5 +1,36 @@
-import game as caravan
+import argparse
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Caravan')
+    parser.add_argument('--simulate', type=int, metavar='N', help='play N games headlessly instead of opening a window')
+    parser.add_argument('--players', default='random,random', help='comma separated player types for the simulation')
+    parser.add_argument('--workers', type=int, default=1, metavar='K', help='number of simulation worker processes')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the first simulated game')
+    parser.add_argument('--max-turns', type=int, default=500, help='turn limit after which a simulated game is a draw')
+    parser.add_argument('--batch', action='store_true', help='advance all games in lockstep with the NumPy engine')
+    parser.add_argument('--quiet', action='store_true', help='only print the simulation summary')
+    parser.add_argument('--bundle', action='store_true', help='pack the art into the pre-scaled asset bundle and exit')
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
-    caravan.start()
+    args = parse_args()
+    if args.bundle:
+        import bundle
+
+        bundle.build()
+    elif args.simulate is not None:
+        import simulation
+
+        player_names = args.players.split(',')
+        if len(player_names) != 2:
+            raise SystemExit('--players expects exactly two comma separated player types')
+        if args.batch:
+            simulation.run_batch(args.simulate, player_names, args.seed, args.max_turns, verbose=not args.quiet)
+        else:
+            simulation.run(args.simulate, player_names, args.workers, args.seed, args.max_turns, verbose=not args.quiet)
+    else:
+        import game as caravan
+
+        caravan.start()
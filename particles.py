@@ -0,0 +1,111 @@
+import numpy as np
+import pygame
+
+
+MAX_RADIUS = 8
+# Pixel offsets covering a disk of every radius up to MAX_RADIUS, a radius 0 particle is a single pixel
+DISK_OFFSETS = []
+for _radius in range(MAX_RADIUS + 1):
+    _dx, _dy = np.mgrid[-_radius:_radius + 1, -_radius:_radius + 1]
+    _inside = _dx ** 2 + _dy ** 2 <= _radius ** 2 + _radius
+    DISK_OFFSETS.append((_dx[_inside], _dy[_inside]))
+
+
+class ParticleSystem:
+    # """
+    # Particles kept as NumPy arrays, one row per particle: position, velocity, color, radius and the frames left to
+    # live. `step` moves every particle at once and `draw` rasterizes them all into one layer that is blitted in a single
+    # call, so the cost per frame hardly depends on how many particles are alive. A particle with `burst` set bursts
+    # into a ball of sparks that wide when it dies (the rockets of a firework).
+    # """
+    def __init__(self, rng: np.random.Generator = None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.position = np.zeros((0, 2))
+        self.velocity = np.zeros((0, 2))
+        self.color = np.zeros((0, 3), dtype=np.uint8)
+        self.radius = np.zeros(0)  # Radius at birth, particles shrink as they run out of life
+        self.life = np.zeros(0, dtype=int)
+        self.lifetime = np.ones(0, dtype=int)
+        self.gravity = np.zeros(0)
+        self.drag = np.ones(0)
+        self.burst = np.zeros(0, dtype=int)
+
+        self.layer: pygame.Surface = None
+
+    def __len__(self):
+        return len(self.life)
+
+    def emit(self, position, velocity, color, radius, life, gravity=0.0, drag=1.0, burst=0):
+        # Add particles, every argument is either one value for all of them or one row per particle
+        n = len(velocity)
+        self.position = np.concatenate([self.position, np.broadcast_to(position, (n, 2))])
+        self.velocity = np.concatenate([self.velocity, velocity])
+        self.color = np.concatenate([self.color, np.broadcast_to(color, (n, 3)).astype(np.uint8)])
+        self.radius = np.concatenate([self.radius, np.broadcast_to(radius, n)])
+        self.life = np.concatenate([self.life, np.broadcast_to(life, n)])
+        self.lifetime = np.concatenate([self.lifetime, np.broadcast_to(life, n)])
+        self.gravity = np.concatenate([self.gravity, np.broadcast_to(gravity, n)])
+        self.drag = np.concatenate([self.drag, np.broadcast_to(drag, n)])
+        self.burst = np.concatenate([self.burst, np.broadcast_to(burst, n)])
+
+    def launch_firework(self, x, bottom, height, travel_time, color, size, max_radius):
+        # A rocket rising from `bottom` that slows down to a halt at `height` after `travel_time` frames, then bursts
+        distance = bottom - height
+        self.emit(
+            (x, bottom), np.array([[0.0, -2 * distance / travel_time]]), color, size / 2, travel_time,
+            gravity=2 * distance / travel_time ** 2, burst=max_radius
+        )
+
+    def explode(self, position, color, radius):
+        sparks = 2 * radius
+        angles = self.rng.uniform(0, 2 * np.pi, sparks)
+        speeds = self.rng.uniform(0.3, 1, sparks) * radius / 12  # With the drag below, sparks end up ~`radius` away
+        velocity = np.column_stack([np.cos(angles), np.sin(angles)]) * speeds[:, None]
+        life = self.rng.integers(35, 55, sparks)
+        self.emit(position, velocity, color, 3, life, gravity=0.03, drag=0.92)
+
+    def step(self):
+        self.velocity[:, 1] += self.gravity
+        self.velocity *= self.drag[:, None]
+        self.position += self.velocity
+        self.life -= 1
+
+        dead = self.life <= 0
+        if not dead.any():
+            return
+        bursting = np.flatnonzero(dead & (self.burst > 0))
+        explosions = [(self.position[i].copy(), self.color[i].copy(), self.burst[i]) for i in bursting]
+
+        alive = ~dead
+        for name in ['position', 'velocity', 'color', 'radius', 'life', 'lifetime', 'gravity', 'drag', 'burst']:
+            setattr(self, name, getattr(self, name)[alive])
+        for position, color, radius in explosions:
+            self.explode(position, color, radius)
+
+    def draw(self, surface: pygame.Surface):
+        if not len(self):
+            return
+        if self.layer is None or self.layer.get_size() != surface.get_size():
+            self.layer = pygame.Surface(surface.get_size()).convert()
+            self.layer.set_colorkey((0, 0, 0))
+        self.layer.fill((0, 0, 0))
+
+        width, height = self.layer.get_size()
+        shrink = np.where(self.burst > 0, 1, self.life / self.lifetime)  # Rockets keep their size up to the burst
+        radii = np.clip(np.rint(self.radius * shrink), 0, MAX_RADIUS).astype(int)
+        xs = np.rint(self.position[:, 0]).astype(int)
+        ys = np.rint(self.position[:, 1]).astype(int)
+        colors = np.maximum(self.color, 1)  # Pure black is the transparent color key
+
+        pixels = pygame.surfarray.pixels3d(self.layer)
+        for radius in np.unique(radii):
+            chosen = radii == radius
+            dx, dy = DISK_OFFSETS[radius]
+            px = (xs[chosen, None] + dx).ravel()
+            py = (ys[chosen, None] + dy).ravel()
+            pc = np.repeat(colors[chosen], len(dx), axis=0)
+            inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+            pixels[px[inside], py[inside]] = pc[inside]
+        del pixels  # Unlocks the layer
+
+        surface.blit(self.layer, (0, 0))
@@ -1,19 +1,30 @@
 import random
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import TYPE_CHECKING
 
-from decks import PlayingDeck, Caravan, Card
+import rules
+from rules import (
+    DISCARD_CARD, DISCARD_CARAVAN, PLAY_CARD, NO_LAYER, STARTING_HAND_SIZE, BEGINNING_PHASE_MOVES, GameState, Move
+)
+from search import TranspositionTable, ismcts, move_key
 
+if TYPE_CHECKING:
+    from decks import PlayingDeck, DrawingDeck, Caravan
 
-DISCARD_CARD = 0
-DISCARD_CARAVAN = 1
-PLAY_CARD = 2
 
-
-class Player:
-    def __init__(self, player=2):
+class Player(ABC):
+    def __init__(self, player=2, rng=random):
         self.player = player
         self.beginning_phase_counter = 3
+        self.rng = rng
+        self.turns_played = 0
+
+        # Cards that left either hand for good, played or discarded, see `observe`
+        self.played: list[int] = []
+        self.opponent_played: list[int] = []
 
-    def find_possible_moves(self, playing_deck: PlayingDeck, caravans: Caravan):
+    def find_possible_moves(self, playing_deck: 'PlayingDeck', caravans: 'list[Caravan]'):
         possibilities = {
             DISCARD_CARD: playing_deck.cards,  # List of cards
             DISCARD_CARAVAN: [],  # List of non-empty owned caravans
@@ -26,45 +37,110 @@ class Player:
                 possibilities[DISCARD_CARAVAN].append(caravan)
 
         for card in playing_deck.cards:
-            if card.is_numerical():
-                for caravan in player_caravans:
-                    on_top_of_card = caravan.cards[0]
-                    if caravan.layers:
-                        on_top_of_card = caravan.layers[-1][0]
-                    if caravan.check_if_move_is_valid(card, on_top_of_card):
+            # Memoised by each caravan until it changes, see `CaravanState.legal_layers`
+            for caravan in player_caravans if card.is_numerical() else caravans:
+                for layer in caravan.state.legal_layers(card.code):
+                    if layer == NO_LAYER:
+                        on_top_of_cards = [caravan.cards[0]]
+                    elif card.is_numerical():
+                        on_top_of_cards = [caravan.layers[layer][0]]
+                    else:
+                        layer_card, adjacents = caravan.layers[layer]
+                        on_top_of_cards = [layer_card, *adjacents]  # A face card may be dropped on any card of the layer
+                    for on_top_of_card in on_top_of_cards:
                         possibilities[PLAY_CARD].append((card, on_top_of_card, caravan))
-            if card.is_face():
-                for caravan in caravans:
-                    for on_top_of_card in caravan.cards[1:]:
-                        if caravan.check_if_move_is_valid(card, on_top_of_card):
-                            possibilities[PLAY_CARD].append((card, on_top_of_card, caravan))
 
         return possibilities
 
+    @abstractmethod
+    def select_move(self, state: GameState):
+        # """
+        # Headless counterpart of `select_next_move`: pick a `Move` (see `GameState.legal_moves`) for `state.turn`.
+        # """
+        ...
+
+    def think(self, state: GameState, cancel=None):
+        # Entry point for background threads, `cancel` is a `threading.Event` asking to answer as soon as possible
+        return self.select_move(state)
+
+    def see_opponent_play(self, card):
+        # The opponent played or discarded `card` (a card code) from its hand
+        self.opponent_played.append(card)
+
+    def observe(self, playing_deck: 'PlayingDeck', caravans: 'list[Caravan]', drawing_decks: 'list[DrawingDeck]'):
+        # """
+        # Rebuild the game from what this player can see: its hand, the caravans, the cards either player has played
+        # or discarded and the size of both drawing piles (`drawing_decks`, in player order). Every card still in play
+        # that it has not seen is dealt to the opponent's hand and both drawing piles, `select_move` is expected to
+        # reshuffle them if it cares.
+        # """
+        opponent = 3 - self.player
+        opponent_moves = self.turns_played + (1 if self.player == 2 else 0)  # Player 1 always moves first
+        counters = [0, 0]
+        counters[self.player - 1] = self.beginning_phase_counter
+        counters[opponent - 1] = max(BEGINNING_PHASE_MOVES - opponent_moves, 0)
+
+        hand = [card.code for card in playing_deck.cards]
+        caravan_states = [caravan.state.copy() for caravan in caravans]
+        # Any card on the table this player did not play came from the opponent's deck, even if it was never reported
+        table = Counter(card for caravan in caravan_states for layer_card, adjacents in caravan.layers for card in [layer_card, *adjacents])
+        opponent_seen = Counter(self.opponent_played)
+        opponent_seen += table - Counter(self.played) - opponent_seen
+        own_draw_pile, opponent_cards = unseen_cards(hand + self.played), unseen_cards(opponent_seen.elements())
+        self.rng.shuffle(own_draw_pile)
+        self.rng.shuffle(opponent_cards)
+
+        own_draw_pile_size = len(drawing_decks[self.player - 1].cards)
+        opponent_draw_pile_size = len(drawing_decks[opponent - 1].cards)
+        opponent_hand_size = min(
+            STARTING_HAND_SIZE - (BEGINNING_PHASE_MOVES - counters[opponent - 1]), len(opponent_cards) - opponent_draw_pile_size
+        )
+        hands, draw_piles = [None, None], [None, None]
+        hands[self.player - 1], draw_piles[self.player - 1] = hand, own_draw_pile[:own_draw_pile_size]
+        hands[opponent - 1] = opponent_cards[:opponent_hand_size]
+        draw_piles[opponent - 1] = opponent_cards[opponent_hand_size:opponent_hand_size + opponent_draw_pile_size]
+        return GameState(hands, draw_piles, caravan_states, self.player, counters)
+
+    def commit_move(self, move: Move, playing_deck: 'PlayingDeck', caravans: 'list[Caravan]'):
+        # Translate a `Move` chosen on an `observe`d state back to the cards and caravans on the table
+        self.turns_played += 1
+        if self.beginning_phase_counter > 0:
+            self.beginning_phase_counter -= 1
+
+        if move.kind == DISCARD_CARAVAN:
+            return DISCARD_CARAVAN, caravans[move.caravan_index]
+        self.played.append(playing_deck.cards[move.hand_index].code)
+        if move.kind == DISCARD_CARD:
+            return DISCARD_CARD, playing_deck.cards[move.hand_index]
+        caravan = caravans[move.caravan_index]
+        on_top_of_card = caravan.cards[0] if move.layer == NO_LAYER else caravan.layers[move.layer][0]
+        return PLAY_CARD, (playing_deck.cards[move.hand_index], on_top_of_card, caravan)
+
 
 class RandomPlayer(Player):
-    def __init__(self, player=2):
-        super().__init__(player)
+    def __init__(self, player=2, rng=random):
+        super().__init__(player, rng)
 
-    def select_next_move(self, playing_deck: PlayingDeck, caravans: Caravan):
+    def select_next_move(self, playing_deck: 'PlayingDeck', caravans: 'list[Caravan]', drawing_decks: 'list[DrawingDeck]'):
+        # `drawing_decks` only matter to players that rebuild the hidden cards, see `observe`
         possibilities = self.find_possible_moves(playing_deck, caravans)
 
         if self.beginning_phase_counter > 0:
             self.beginning_phase_counter -= 1
             return self.select_next_move_in_beginning_phase(possibilities[PLAY_CARD])
 
-        r = random.random()
+        r = self.rng.random()
         if r < 0.95 and possibilities[PLAY_CARD]:
-            return PLAY_CARD, random.choice(possibilities[PLAY_CARD])
+            return PLAY_CARD, self.rng.choice(possibilities[PLAY_CARD])
         elif r < 0.99 and possibilities[DISCARD_CARD]:
-            return DISCARD_CARD, random.choice(possibilities[DISCARD_CARD])
+            return DISCARD_CARD, self.rng.choice(possibilities[DISCARD_CARD])
         elif possibilities[DISCARD_CARAVAN]:
-            return DISCARD_CARAVAN, random.choice(possibilities[DISCARD_CARAVAN])
+            return DISCARD_CARAVAN, self.rng.choice(possibilities[DISCARD_CARAVAN])
         else:
             if possibilities[PLAY_CARD]:
-                return PLAY_CARD, random.choice(possibilities[PLAY_CARD])
+                return PLAY_CARD, self.rng.choice(possibilities[PLAY_CARD])
             else:
-                return DISCARD_CARD, random.choice(possibilities[DISCARD_CARD])
+                return DISCARD_CARD, self.rng.choice(possibilities[DISCARD_CARD])
 
     def select_next_move_in_beginning_phase(self, possibilities):
         result = []
@@ -73,4 +149,90 @@ class RandomPlayer(Player):
             if card.is_numerical() and not caravan.layers:
                 result.append((card, on_top_of_card, caravan))
 
-        return PLAY_CARD, random.choice(result)
+        return PLAY_CARD, self.rng.choice(result)
+
+    def select_move(self, state: GameState):
+        moves = state.legal_moves()
+        if state.beginning_phase_counters[state.turn - 1] > 0:
+            return self.rng.choice(moves)
+
+        possibilities = {DISCARD_CARD: [], DISCARD_CARAVAN: [], PLAY_CARD: []}
+        for move in moves:
+            possibilities[move.kind].append(move)
+
+        r = self.rng.random()
+        if r < 0.95 and possibilities[PLAY_CARD]:
+            return self.rng.choice(possibilities[PLAY_CARD])
+        elif r < 0.99 and possibilities[DISCARD_CARD]:
+            return self.rng.choice(possibilities[DISCARD_CARD])
+        elif possibilities[DISCARD_CARAVAN]:
+            return self.rng.choice(possibilities[DISCARD_CARAVAN])
+        else:
+            return self.rng.choice(possibilities[PLAY_CARD] or possibilities[DISCARD_CARD])
+
+
+class ISMCTSPlayer(Player):
+    # """
+    # Information set Monte Carlo Tree Search. The player never looks at the opponent's hand or at the order of either
+    # drawing pile, it samples them anew for every search iteration. Thinking time per turn is capped by
+    # `time_budget_ms` and/or `max_iterations`.
+    # """
+    def __init__(self, player=2, rng=random, time_budget_ms=300, max_iterations=None, exploration=0.7, rollout_depth=40):
+        super().__init__(player, rng)
+        self.time_budget_ms = time_budget_ms
+        self.max_iterations = max_iterations
+        self.exploration = exploration
+        self.rollout_depth = rollout_depth
+        self.table = TranspositionTable()  # Legal moves by state hash, shared by every search of this player
+
+    def search(self, state: GameState, opponent_cards, opponent_hand_size, own_draw_pile, cancel=None):
+        # """
+        # Pick a move for `state.turn` (this player). `opponent_cards` are the cards the opponent may hold in hand or in
+        # their drawing pile, `own_draw_pile` the cards left in this player's drawing pile, in any order.
+        # """
+        opponent = 3 - self.player
+
+        def determinize(rng):
+            hidden = opponent_cards[:]
+            rng.shuffle(hidden)
+            draw_pile = own_draw_pile[:]
+            rng.shuffle(draw_pile)
+            hands, draw_piles = [None, None], [None, None]
+            hands[self.player - 1], draw_piles[self.player - 1] = state.hands[self.player - 1][:], draw_pile
+            hands[opponent - 1], draw_piles[opponent - 1] = hidden[:opponent_hand_size], hidden[opponent_hand_size:]
+            return state.determinization(hands, draw_piles)
+
+        moves = {move_key(state, move): move for move in state.legal_moves()}
+        self.table.new_generation()
+        key = ismcts(
+            determinize, self.rng, self.time_budget_ms, self.max_iterations, self.exploration, self.rollout_depth,
+            self.table, cancel
+        )
+        return moves[key] if key is not None else self.rng.choice(list(moves.values()))
+
+    def select_move(self, state: GameState, cancel=None):
+        opponent = 3 - self.player
+        opponent_cards = state.hands[opponent - 1] + state.draw_piles[opponent - 1]
+        return self.search(
+            state, opponent_cards, len(state.hands[opponent - 1]), state.draw_piles[self.player - 1], cancel
+        )
+
+    def think(self, state: GameState, cancel=None):
+        return self.select_move(state, cancel)
+
+    def select_next_move(self, playing_deck: 'PlayingDeck', caravans: 'list[Caravan]', drawing_decks: 'list[DrawingDeck]'):
+        return self.commit_move(self.select_move(self.observe(playing_deck, caravans, drawing_decks)), playing_deck, caravans)
+
+
+def unseen_cards(seen):
+    cards = rules.generate_all_cards()
+    for card in seen:
+        if card in cards:
+            cards.remove(card)
+    return cards
+
+
+PLAYERS = {
+    'random': RandomPlayer,
+    'ismcts': ISMCTSPlayer,
+}
@@ -0,0 +1,176 @@
+from collections import OrderedDict
+import json
+import mmap
+import os
+import threading
+
+import pygame
+
+
+# """
+# Images shared by the whole game. Every file is decoded once and every (path, size) pair is scaled once, cards,
+# buttons and backgrounds all get the same surfaces back. Nobody owns them: copy a surface before drawing on it.
+# """
+images: dict[str, pygame.Surface] = {}  # path -> decoded file
+surfaces: dict[tuple, pygame.Surface] = {}  # (path, size) -> scaled surface, size None meaning the original size
+converted: set[tuple] = set()  # Keys of `surfaces` already converted to the display's pixel format
+lock = threading.RLock()  # Scenes are also built on a background worker (see `states.scene_executor`)
+
+
+def load_image(path, size=None):
+    with lock:
+        key = path, size
+        surface = surfaces.get(key)
+        can_convert = pygame.display.get_surface() is not None  # Surfaces loaded before the window exists stay as decoded
+        if surface is not None and (key in converted or not can_convert):
+            return surface
+
+        surface = load_bundled_image(path, size)
+        if surface is None:
+            image = images.get(path)
+            if image is None:
+                image = images[path] = pygame.image.load(path)
+            surface = image if size is None else pygame.transform.scale(image, size)
+        if can_convert:
+            surface = surface.convert_alpha()
+            converted.add(key)
+        surfaces[key] = surface
+        return surface
+
+
+# """
+# The asset bundle: images decoded and scaled ahead of time by `python main.py --bundle`, stored as raw RGBA pixels in
+# one file that is memory-mapped on first use. Loading a bundled image is a copy of its pixels instead of a PNG decode
+# and a rescale. Entries whose source file changed since the bundle was built are ignored, as is a missing bundle.
+# """
+BUNDLE_PATH = 'assets/bundle'
+bundle = None  # (path, size) -> pixels, once the bundle is opened
+
+
+def open_bundle():
+    global bundle
+    if bundle is not None:
+        return bundle
+    bundle = {}
+    try:
+        with open(f'{BUNDLE_PATH}.json') as index_file:
+            index = json.load(index_file)
+        with open(f'{BUNDLE_PATH}.bin', 'rb') as data_file:
+            data = memoryview(mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError):
+        return bundle
+    for entry in index:
+        width, height = entry['width'], entry['height']
+        size = None if entry['original'] else (width, height)
+        pixels = data[entry['offset']:entry['offset'] + width * height * 4]
+        bundle[(entry['path'], size)] = pixels, (width, height), entry['mtime']
+    return bundle
+
+
+def load_bundled_image(path, size):
+    entry = open_bundle().get((path, size))
+    if entry is None:
+        return None
+    pixels, pixels_size, mtime = entry
+    try:
+        if os.stat(path).st_mtime_ns != mtime:
+            return None
+    except OSError:
+        pass  # Shipped without the source art, the bundle is all there is
+    return pygame.image.frombuffer(pixels, pixels_size, 'RGBA')
+
+
+def build_bundle(entries, path=BUNDLE_PATH):
+    # Write the (path, size) images of `entries` to a new bundle, size None meaning the original size of the image
+    index = []
+    offset = 0
+    with open(f'{path}.bin', 'wb') as data_file:
+        for image_path, size in entries:
+            image = pygame.image.load(image_path)
+            if size is not None:
+                image = pygame.transform.scale(image, size)
+            pixels = pygame.image.tobytes(image, 'RGBA')
+            data_file.write(pixels)
+            index.append({
+                'path': image_path, 'original': size is None, 'width': image.get_width(), 'height': image.get_height(),
+                'offset': offset, 'mtime': os.stat(image_path).st_mtime_ns
+            })
+            offset += len(pixels)
+    with open(f'{path}.json', 'w') as index_file:
+        json.dump(index, index_file, indent=1)
+    return index
+
+
+# """
+# Rotated copies of shared images, least recently used first. Cards moving through an animation rotate the same artwork
+# by nearly the same angles over and over, so angles are rounded to ROTATION_STEP degrees and every card showing the
+# same image shares the result. At most MAX_ROTATIONS surfaces are kept.
+# """
+ROTATION_STEP = 0.5
+MAX_ROTATIONS = 4096
+rotations: OrderedDict[tuple, pygame.Surface] = OrderedDict()  # (image, rounded angle) -> rotated surface
+
+
+def rotate_image(image, angle):
+    with lock:
+        key = image, round(angle / ROTATION_STEP)
+        rotated = rotations.get(key)
+        if rotated is not None:
+            rotations.move_to_end(key)
+            return rotated
+        rotated = rotations[key] = pygame.transform.rotate(image, key[1] * ROTATION_STEP)
+        if len(rotations) > MAX_ROTATIONS:
+            rotations.popitem(last=False)
+        return rotated
+
+
+# """
+# Tinted copies of shared images (hovered and selected cards), least recently used first. Keyed by the image itself, so
+# a tint is computed once per face, angle and color however many frames the mouse rests on a card.
+# """
+MAX_TINTS = 512
+tints: OrderedDict[tuple, pygame.Surface] = OrderedDict()  # (image, color) -> tinted copy
+
+
+def tint_image(image, color):
+    with lock:
+        key = image, color
+        tinted = tints.get(key)
+        if tinted is not None:
+            tints.move_to_end(key)
+            return tinted
+        tinted = tints[key] = image.copy()
+        tinted.fill(color, special_flags=pygame.BLEND_MULT)
+        if len(tints) > MAX_TINTS:
+            tints.popitem(last=False)
+        return tinted
+
+
+# """
+# Fonts are opened once per (path, size) and every rendered text is kept, keyed by (text, path, size, color). Only a
+# handful of different strings are ever on screen (caravan values, button labels), so the same few surfaces are blitted
+# frame after frame instead of being rasterized again 80 times per second.
+# """
+MAX_TEXTS = 1024
+fonts: dict[tuple, pygame.font.Font] = {}  # (path, size) -> font
+texts: OrderedDict[tuple, pygame.Surface] = OrderedDict()  # (text, path, size, color) -> rendered text
+
+
+def load_font(path, size):
+    font = fonts.get((path, size))
+    if font is None:
+        font = fonts[(path, size)] = pygame.font.Font(path, size=size)
+    return font
+
+
+def render_text(text, path, size, color):
+    with lock:
+        key = text, path, size, tuple(color)
+        surface = texts.get(key)
+        if surface is not None:
+            texts.move_to_end(key)
+            return surface
+        surface = texts[key] = load_font(path, size).render(text, True, color).convert_alpha()
+        if len(texts) > MAX_TEXTS:
+            texts.popitem(last=False)
+        return surface
@@ -0,0 +1,613 @@
+import copy
+import random
+from typing import NamedTuple
+
+
+RANK_A = 1
+RANK_2 = 2
+RANK_3 = 3
+RANK_4 = 4
+RANK_5 = 5
+RANK_6 = 6
+RANK_7 = 7
+RANK_8 = 8
+RANK_9 = 9
+RANK_10 = 10
+RANK_J = 11
+RANK_Q = 12
+RANK_K = 13
+RANK_JOKER = 14
+
+SUIT_SPADES = 1
+SUIT_HEARTS = 2
+SUIT_DIAMONDS = 3
+SUIT_CLUBS = 4
+SUIT_BLACK_JOKER = 5
+SUIT_RED_JOKER = 6
+
+RANKS = [RANK_A, RANK_2, RANK_3, RANK_4, RANK_5, RANK_6, RANK_7, RANK_8, RANK_9, RANK_10, RANK_J, RANK_Q, RANK_K, RANK_JOKER]
+RANK_NAMES = ['A', '02', '03', '04', '05', '06', '07', '08', '09', '10', 'J', 'Q', 'K', 'joker']
+
+SUITS = [SUIT_SPADES, SUIT_HEARTS, SUIT_DIAMONDS, SUIT_CLUBS, SUIT_BLACK_JOKER, SUIT_RED_JOKER]
+SUIT_NAMES = ['spades', 'hearts', 'diamonds', 'clubs', 'black', 'red']
+
+DESC = -1
+UNDEFINED = 0
+ASC = 1
+
+MIN_CARAVAN_THRESHOLD = 21
+MAX_CARAVAN_THRESHOLD = 26
+
+DECK_SIZE = 54
+MAX_CARAVAN_LAYERS = 7
+MAX_FACE_CARDS_PER_LAYER = 3
+STARTING_HAND_SIZE = 8
+MIN_HAND_SIZE = 5
+BEGINNING_PHASE_MOVES = 3
+
+NO_LAYER = -1  # Target of a numerical card played on an empty caravan
+
+DISCARD_CARD = 0
+DISCARD_CARAVAN = 1
+PLAY_CARD = 2
+
+
+# """
+# Cards are small integers: the rank lives in the high bits and the suit in the lowest three.
+# """
+def make_card(rank, suit):
+    return rank << 3 | suit
+
+
+def rank_of(card):
+    return card >> 3
+
+
+def suit_of(card):
+    return card & 7
+
+
+def is_numerical(card):
+    return RANK_A <= card >> 3 <= RANK_10
+
+
+def is_face(card):
+    return RANK_J <= card >> 3 <= RANK_JOKER
+
+
+def card_name(card):
+    return f'{RANK_NAMES[rank_of(card) - 1]} {SUIT_NAMES[suit_of(card) - 1]}'
+
+
+def generate_all_cards():
+    return ([make_card(rank, suit) for rank in RANKS[:-1] for suit in SUITS[:-2]] +
+            [make_card(RANK_JOKER, SUIT_BLACK_JOKER), make_card(RANK_JOKER, SUIT_RED_JOKER)])
+
+
+def generate_valid_player_and_drawing_deck(num_cards: int = DECK_SIZE, rng=random):
+    cards = generate_all_cards()[:num_cards]
+    numeric_indices = rng.sample(range(40), 3)  # The first 40 cards of a deck are the numerical ones
+    numeric = [cards[i] for i in numeric_indices]
+    cards = [card for i, card in enumerate(cards) if i not in numeric_indices]
+    rng.shuffle(cards)
+    return numeric + cards[:MIN_HAND_SIZE], cards[MIN_HAND_SIZE:]
+
+
+# """
+# Zobrist keys: one random 64-bit number per (place, card). The hash of a game state is the XOR of the keys of every
+# card where it lies, plus the turn and the beginning phase counters, so a move only has to XOR in and out the few
+# keys it touches. Drawing piles are keyed by distance from the bottom, so drawing the top card moves no other card.
+# """
+def _zobrist_keys(rng, *shape):
+    if not shape:
+        return rng.getrandbits(64)
+    return [_zobrist_keys(rng, *shape[1:]) for _ in range(shape[0])]
+
+
+_zobrist_rng = random.Random(0xCA7A5A)
+NUM_CARD_CODES = make_card(RANK_JOKER, SUIT_RED_JOKER) + 1
+ZOBRIST_HANDS = _zobrist_keys(_zobrist_rng, 2, STARTING_HAND_SIZE, NUM_CARD_CODES)
+ZOBRIST_DRAW_PILES = _zobrist_keys(_zobrist_rng, 2, DECK_SIZE - STARTING_HAND_SIZE, NUM_CARD_CODES)
+# Slot 0 is the numerical card of a layer, slots 1-4 its face cards (a Jack may briefly be the fourth)
+ZOBRIST_CARAVANS = _zobrist_keys(_zobrist_rng, 6, MAX_CARAVAN_LAYERS, MAX_FACE_CARDS_PER_LAYER + 2, NUM_CARD_CODES)
+ZOBRIST_BEGINNING_PHASE = _zobrist_keys(_zobrist_rng, 2, BEGINNING_PHASE_MOVES + 1)
+ZOBRIST_TURN = _zobrist_keys(_zobrist_rng)
+
+
+class CaravanState:
+    def __init__(self, layers=None):
+        self.layers: list[list[int, list[int]]] = layers if layers is not None else []
+        self.listeners: list = []  # Called with the caravan after every change
+        self.version = 0  # Bumped after every change, for cheap polling
+        self.legal_layer_cache: dict[int, list[int]] = {}  # card -> `legal_layers(card)`, dropped on every change
+
+        # Kept up to date on every change instead of being recalculated by whoever needs them
+        self.value = self.calculate_value()
+        self.suit = UNDEFINED
+        self.direction = UNDEFINED
+        self.is_sold = False
+        self.is_overweight = False
+        self._refresh()
+
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+
+    def _refresh(self):
+        # Suit and direction only depend on the last two layers, so refreshing them is O(1)
+        self.suit = self.calculate_suit()
+        self.direction = self.calculate_direction()
+        self.is_sold = MIN_CARAVAN_THRESHOLD <= self.value <= MAX_CARAVAN_THRESHOLD
+        self.is_overweight = self.value > MAX_CARAVAN_THRESHOLD
+
+    def _changed(self):
+        self._refresh()
+        self.version += 1
+        self.legal_layer_cache = {}  # A new dict, copies made before the change still share and use the old one
+        for callback in self.listeners:
+            callback(self)
+
+    def layer_value(self, layer):
+        card, adjacents = self.layers[layer]
+        kings = 0
+        for adj in adjacents:
+            if adj >> 3 == RANK_K:
+                kings += 1
+        return (card >> 3) << kings
+
+    def calculate_value(self):
+        return sum(self.layer_value(layer) for layer in range(len(self.layers)))
+
+    def calculate_suit(self):
+        if not self.layers:
+            return UNDEFINED
+        card, adjacents = self.layers[-1]
+        suit = suit_of(card)
+        for adj in adjacents:
+            if adj >> 3 == RANK_Q:
+                suit = suit_of(adj)
+        return suit
+
+    def calculate_direction(self):
+        if len(self.layers) <= 1:
+            return UNDEFINED
+        card_1 = self.layers[-2][0]
+        card_2, adjacents = self.layers[-1]
+        if card_1 >> 3 >= card_2 >> 3:
+            direction = DESC  # Yes, if the last two cards have the same rank, FNV considers the caravan as decreasing
+        else:
+            direction = ASC
+        for adj in adjacents:
+            if adj >> 3 == RANK_Q:
+                direction *= -1
+        return direction
+
+    def check_if_move_is_valid(self, card, layer=NO_LAYER):
+        if is_numerical(card):
+            if not self.layers:
+                return True  # Numerical card can be placed on an empty caravan
+            if len(self.layers) >= MAX_CARAVAN_LAYERS:
+                return False  # Numerical card can't be placed on a caravan with max capacity
+            if layer != len(self.layers) - 1:
+                return False  # Numerical card can't be placed in the middle of the deck, must be placed as the last card
+            rank, layer_rank = card >> 3, self.layers[-1][0] >> 3
+            if (layer_rank > rank and self.direction != ASC) or (layer_rank < rank and self.direction != DESC):
+                return True  # Numerical card follows caravan order (direction)
+            return suit_of(card) == self.suit and rank != layer_rank  # Numerical card matches the caravan suit
+        if 0 <= layer < len(self.layers):
+            if len(self.layers[layer][1]) >= MAX_FACE_CARDS_PER_LAYER and card >> 3 != RANK_J:
+                return False  # Face card can't be placed on selected card with max capacity of face cards
+            return True  # Face card can be placed on selected card
+        return False  # Face card can't be placed on an empty caravan
+
+    def legal_layers(self, card):
+        # Layers `card` may be played on, a numerical card on an empty caravan goes on NO_LAYER
+        layers = self.legal_layer_cache.get(card)
+        if layers is None:
+            if is_numerical(card):
+                layer = len(self.layers) - 1
+                layers = [layer] if self.check_if_move_is_valid(card, layer) else []
+            else:
+                layers = [layer for layer in range(len(self.layers)) if self.check_if_move_is_valid(card, layer)]
+            self.legal_layer_cache[card] = layers
+        return layers
+
+    def add_card_on(self, card, layer=NO_LAYER):
+        if is_numerical(card):
+            self.layers.append([card, []])
+            self.value += card >> 3
+        elif 0 <= layer < len(self.layers):
+            if card >> 3 == RANK_K:
+                self.value += self.layer_value(layer)  # A King doubles the value of its layer
+            self.layers[layer][1].append(card)
+        else:
+            return
+        self._changed()
+
+    def remove_layer(self, layer):
+        self.value -= self.layer_value(layer)
+        card, adjacents = self.layers.pop(layer)
+        self._changed()
+        return [card, *adjacents]
+
+    def insert_layer(self, layer, cards):
+        # Inverse of `remove_layer`: put back a layer given as [card, *adjacents]
+        self.layers.insert(layer, [cards[0], list(cards[1:])])
+        self.value += self.layer_value(layer)
+        self._changed()
+
+    def remove_face(self, layer):
+        # Inverse of `add_card_on` for a face card: take back the last face card of the layer
+        value = self.layer_value(layer)
+        card = self.layers[layer][1].pop()
+        self.value += self.layer_value(layer) - value
+        self._changed()
+        return card
+
+    def clear(self):
+        cards = [card for layer_card, adjacents in self.layers for card in (layer_card, *adjacents)]
+        self.layers = []  # A new list, so the old one can be handed back to `restore`
+        self.value = 0
+        self._changed()
+        return cards
+
+    def restore(self, layers):
+        self.layers = layers
+        self.value = self.calculate_value()
+        self._changed()
+
+    def copy(self):
+        caravan = copy.copy(self)
+        caravan.layers = [[card, adjacents[:]] for card, adjacents in self.layers]
+        caravan.listeners = []
+        return caravan
+
+
+def find_joker_targets(caravans: list[CaravanState], caravan_index, layer):
+    # """
+    # Return the (caravan, layer) positions a Joker played on the given layer wipes out. A Joker on an Ace removes every
+    # other card of the Ace's suit, otherwise every other card of the same rank. Layers are listed from the last one
+    # down so they can be popped in order.
+    # """
+    template = caravans[caravan_index].layers[layer][0]
+    targets = []
+    for i, caravan in enumerate(caravans):
+        for j in range(len(caravan.layers) - 1, -1, -1):
+            if i == caravan_index and j == layer:
+                continue
+            layer_card = caravan.layers[j][0]
+            if (
+                template >> 3 == RANK_A and suit_of(layer_card) == suit_of(template)
+                or template >> 3 != RANK_A and layer_card >> 3 == template >> 3
+            ):
+                targets.append((i, j))
+    return targets
+
+
+def check_winning_condition(values):
+    c1, c2, c3, o1, o2, o3 = values
+    if (
+            not (MIN_CARAVAN_THRESHOLD <= c1 <= MAX_CARAVAN_THRESHOLD or MIN_CARAVAN_THRESHOLD <= o1 <= MAX_CARAVAN_THRESHOLD)
+            or not (MIN_CARAVAN_THRESHOLD <= c2 <= MAX_CARAVAN_THRESHOLD or MIN_CARAVAN_THRESHOLD <= o2 <= MAX_CARAVAN_THRESHOLD)
+            or not (MIN_CARAVAN_THRESHOLD <= c3 <= MAX_CARAVAN_THRESHOLD or MIN_CARAVAN_THRESHOLD <= o3 <= MAX_CARAVAN_THRESHOLD)
+    ):
+        return None  # There exists a set of competing caravans that does not contain a sold caravan
+
+    if c1 == o1 or c2 == o2 or c3 == o3:
+        return None  # There exists a set of competing caravans that are tied
+
+    p1_win_count = sum([1 if y > MAX_CARAVAN_THRESHOLD or MAX_CARAVAN_THRESHOLD >= x > y else 0 for x, y in [(c1, o1), (c2, o2), (c3, o3)]])
+    return 1 if p1_win_count >= 2 else 2  # Return the number of the player that has more winning caravans
+
+
+class Move(NamedTuple):
+    # """
+    # A single move: (PLAY_CARD, hand_index, caravan_index, layer), (DISCARD_CARD, hand_index) or
+    # (DISCARD_CARAVAN, caravan_index=caravan_index). Moves are immutable and hashable, everything needed to take one
+    # back is kept by the `GameState` that applied it.
+    # """
+    kind: int
+    hand_index: int = -1
+    caravan_index: int = -1
+    layer: int = NO_LAYER
+
+
+class GameState:
+    # """
+    # Pure-Python Standard Mode game. Caravans 0-2 belong to player 1 and caravans 3-5 to player 2, the top of a
+    # drawing pile is its first card, exactly like `DrawingDeck.cards`.
+    #
+    # Moves are made with `apply` and taken back with `undo`, which is what a search wants: one state walked up and
+    # down the tree instead of a copy per node. `clone` is copy-on-write, hands, drawing piles and caravans are shared
+    # with the clone until one of the two writes to them.
+    # """
+    def __init__(self, hands, draw_piles, caravans=None, turn=1, beginning_phase_counters=None):
+        self.hands: list[list[int]] = hands
+        self.draw_piles: list[list[int]] = draw_piles
+        self.caravans: list[CaravanState] = caravans if caravans is not None else [CaravanState() for _ in range(6)]
+        self.turn = turn
+        self.beginning_phase_counters = beginning_phase_counters if beginning_phase_counters else [BEGINNING_PHASE_MOVES] * 2
+        self.history: list[tuple[Move, tuple]] = []  # (move, undo record) of every applied move
+        self.owned = [True] * 10  # Hands 0-1, drawing piles 2-3 and caravans 4-9 that are not shared with a clone
+        self.hash = self.calculate_hash()  # Zobrist hash, kept up to date by every move
+
+    def copy(self):
+        return GameState(
+            [hand[:] for hand in self.hands],
+            [pile[:] for pile in self.draw_piles],
+            [caravan.copy() for caravan in self.caravans],
+            self.turn,
+            self.beginning_phase_counters[:]
+        )
+
+    def clone(self):
+        state = copy.copy(self)
+        state.hands = self.hands[:]
+        state.draw_piles = self.draw_piles[:]
+        state.caravans = self.caravans[:]
+        state.beginning_phase_counters = self.beginning_phase_counters[:]
+        state.history = []
+        state.owned = [False] * 10
+        self.owned = [False] * 10
+        return state
+
+    def determinization(self, hands, draw_piles):
+        # """
+        # Clone sharing this state's caravans but holding the given hands and drawing piles. Used by search players to
+        # fill in the cards they can't see.
+        # """
+        state = self.clone()
+        state.hands = hands
+        state.draw_piles = draw_piles
+        state.owned[:4] = [True] * 4
+        state.hash = state.calculate_hash()
+        return state
+
+    def _hand(self, player):
+        if not self.owned[player - 1]:
+            self.hands[player - 1] = self.hands[player - 1][:]
+            self.owned[player - 1] = True
+        return self.hands[player - 1]
+
+    def _draw_pile(self, player):
+        if not self.owned[player + 1]:
+            self.draw_piles[player - 1] = self.draw_piles[player - 1][:]
+            self.owned[player + 1] = True
+        return self.draw_piles[player - 1]
+
+    def _caravan(self, caravan_index):
+        if not self.owned[caravan_index + 4]:
+            self.caravans[caravan_index] = self.caravans[caravan_index].copy()
+            self.owned[caravan_index + 4] = True
+        return self.caravans[caravan_index]
+
+    def hand_hash(self, player, start=0):
+        keys = ZOBRIST_HANDS[player - 1]
+        hand = self.hands[player - 1]
+        h = 0
+        for k in range(start, len(hand)):
+            h ^= keys[k][hand[k]]
+        return h
+
+    def caravan_hash(self, caravan_index, start=0):
+        keys = ZOBRIST_CARAVANS[caravan_index]
+        layers = self.caravans[caravan_index].layers
+        h = 0
+        for j in range(start, len(layers)):
+            card, adjacents = layers[j]
+            layer_keys = keys[j]
+            h ^= layer_keys[0][card]
+            for k, adj in enumerate(adjacents, 1):
+                h ^= layer_keys[k][adj]
+        return h
+
+    def calculate_hash(self):
+        h = ZOBRIST_TURN if self.turn == 2 else 0
+        for player in (1, 2):
+            h ^= self.hand_hash(player)
+            h ^= ZOBRIST_BEGINNING_PHASE[player - 1][self.beginning_phase_counters[player - 1]]
+            keys = ZOBRIST_DRAW_PILES[player - 1]
+            for k, card in enumerate(reversed(self.draw_piles[player - 1])):
+                h ^= keys[k][card]
+        for i in range(len(self.caravans)):
+            h ^= self.caravan_hash(i)
+        return h
+
+    @staticmethod
+    def player_caravan_indices(player):
+        return range(0, 3) if player == 1 else range(3, 6)
+
+    def find_possible_moves(self, player=None):
+        player = player if player is not None else self.turn
+        hand = self.hands[player - 1]
+        possibilities = {
+            DISCARD_CARD: list(range(len(hand))),  # List of hand indices
+            DISCARD_CARAVAN: [],  # List of non-empty owned caravan indices
+            PLAY_CARD: []  # List of tuples of the form: (hand_index, caravan_index, layer)
+        }
+        own_caravans = self.player_caravan_indices(player)
+
+        for i in own_caravans:
+            if self.caravans[i].layers:
+                possibilities[DISCARD_CARAVAN].append(i)
+
+        caravans = self.caravans
+        all_caravans = range(len(caravans))
+        plays = possibilities[PLAY_CARD]
+        for h, card in enumerate(hand):
+            for i in own_caravans if card >> 3 <= RANK_10 else all_caravans:
+                caravan = caravans[i]
+                layers = caravan.legal_layer_cache.get(card)  # Looked up here first, this loop is the hottest in search
+                if layers is None:
+                    layers = caravan.legal_layers(card)
+                for layer in layers:
+                    plays.append((h, i, layer))
+
+        return possibilities
+
+    def legal_moves(self):
+        # """
+        # Flat list of `Move`s for the player to move. While in the beginning phase a player may only start one of
+        # their empty caravans with a numerical card.
+        # """
+        player = self.turn
+        possibilities = self.find_possible_moves(player)
+        if self.beginning_phase_counters[player - 1] > 0:
+            hand = self.hands[player - 1]
+            return [
+                Move(PLAY_CARD, h, i, layer) for h, i, layer in possibilities[PLAY_CARD]
+                if is_numerical(hand[h]) and not self.caravans[i].layers
+            ]
+        return (
+            [Move(PLAY_CARD, h, i, layer) for h, i, layer in possibilities[PLAY_CARD]]
+            + [Move(DISCARD_CARD, h) for h in possibilities[DISCARD_CARD]]
+            + [Move(DISCARD_CARAVAN, caravan_index=i) for i in possibilities[DISCARD_CARAVAN]]
+        )
+
+    def has_legal_move(self):
+        player = self.turn
+        if self.beginning_phase_counters[player - 1] > 0:
+            return bool(self.legal_moves())
+        return bool(self.hands[player - 1]) or any(self.caravans[i].layers for i in self.player_caravan_indices(player))
+
+    def apply(self, move: Move):
+        player = self.turn
+        if move.kind == PLAY_CARD:
+            record = self.play_card(player, move.hand_index, move.caravan_index, move.layer)
+        elif move.kind == DISCARD_CARD:
+            record = self.discard_card(player, move.hand_index)
+        else:
+            record = self.discard_caravan(move.caravan_index)
+        self.history.append((move, record))
+        self.end_turn()
+
+    def undo(self, move: Move):
+        # """
+        # Take back `move`, which has to be the last applied one. Every step of `apply` is reverted in reverse order.
+        # """
+        last_move, record = self.history.pop()
+        assert last_move == move
+        self.end_turn()
+        player = self.turn
+
+        if move.kind == PLAY_CARD:
+            card, removed, used_beginning_move, drew = record
+            if drew:
+                self.undraw_card(player)
+            if used_beginning_move:
+                self.set_beginning_phase_counter(player, self.beginning_phase_counters[player - 1] + 1)
+            for i, j, cards in reversed(removed):
+                self.hash ^= self.caravan_hash(i, j)
+                self._caravan(i).insert_layer(j, cards)
+                self.hash ^= self.caravan_hash(i, j)
+            caravan = self._caravan(move.caravan_index)
+            if is_numerical(card):
+                self.hash ^= ZOBRIST_CARAVANS[move.caravan_index][len(caravan.layers) - 1][0][card]
+                caravan.remove_layer(len(caravan.layers) - 1)
+            else:
+                self.hash ^= ZOBRIST_CARAVANS[move.caravan_index][move.layer][len(caravan.layers[move.layer][1])][card]
+                caravan.remove_face(move.layer)
+            self.insert_into_hand(player, move.hand_index, card)
+        elif move.kind == DISCARD_CARD:
+            card, drew = record
+            if drew:
+                self.undraw_card(player)
+            self.insert_into_hand(player, move.hand_index, card)
+        else:
+            self._caravan(move.caravan_index).restore(record)
+            self.hash ^= self.caravan_hash(move.caravan_index)
+
+    def play_card(self, player, hand_index, caravan_index, layer=NO_LAYER):
+        card = self.pop_from_hand(player, hand_index)
+        caravan = self._caravan(caravan_index)
+        caravan.add_card_on(card, layer)
+        if is_numerical(card):
+            self.hash ^= ZOBRIST_CARAVANS[caravan_index][len(caravan.layers) - 1][0][card]
+        else:
+            self.hash ^= ZOBRIST_CARAVANS[caravan_index][layer][len(caravan.layers[layer][1])][card]
+
+        removed = self.resolve_face_card(caravan_index, layer) if is_face(card) else []
+
+        used_beginning_move = self.beginning_phase_counters[player - 1] > 0
+        if used_beginning_move:
+            self.set_beginning_phase_counter(player, self.beginning_phase_counters[player - 1] - 1)
+        drew = len(self.hands[player - 1]) < MIN_HAND_SIZE and self.draw_card(player)
+        return card, removed, used_beginning_move, drew
+
+    def resolve_face_card(self, caravan_index, layer):
+        # """
+        # Carry out the Jack or Joker lying on top of the given layer and return the removed layers as
+        # (caravan_index, layer, [card, *adjacents]) in removal order. Any other face card has no effect.
+        # """
+        card = self.caravans[caravan_index].layers[layer][1][-1]
+        removed = []
+        if card >> 3 == RANK_J:
+            removed.append((caravan_index, layer, self.remove_layer(caravan_index, layer)))
+        elif card >> 3 == RANK_JOKER:
+            for i, j in find_joker_targets(self.caravans, caravan_index, layer):
+                removed.append((i, j, self.remove_layer(i, j)))
+        return removed
+
+    def discard_card(self, player, hand_index):
+        card = self.pop_from_hand(player, hand_index)
+        return card, self.draw_card(player)
+
+    def discard_caravan(self, caravan_index):
+        self.hash ^= self.caravan_hash(caravan_index)
+        caravan = self._caravan(caravan_index)
+        layers = caravan.layers
+        caravan.clear()
+        return layers
+
+    def remove_layer(self, caravan_index, layer):
+        self.hash ^= self.caravan_hash(caravan_index, layer)  # Every layer above the removed one moves down
+        cards = self._caravan(caravan_index).remove_layer(layer)
+        self.hash ^= self.caravan_hash(caravan_index, layer)
+        return cards
+
+    def pop_from_hand(self, player, hand_index):
+        self.hash ^= self.hand_hash(player, hand_index)
+        card = self._hand(player).pop(hand_index)
+        self.hash ^= self.hand_hash(player, hand_index)
+        return card
+
+    def insert_into_hand(self, player, hand_index, card):
+        self.hash ^= self.hand_hash(player, hand_index)
+        self._hand(player).insert(hand_index, card)
+        self.hash ^= self.hand_hash(player, hand_index)
+
+    def set_beginning_phase_counter(self, player, counter):
+        keys = ZOBRIST_BEGINNING_PHASE[player - 1]
+        self.hash ^= keys[self.beginning_phase_counters[player - 1]] ^ keys[counter]
+        self.beginning_phase_counters[player - 1] = counter
+
+    def draw_card(self, player):
+        pile = self.draw_piles[player - 1]
+        if not pile:
+            return False
+        hand = self.hands[player - 1]
+        card = pile[0]
+        self.hash ^= ZOBRIST_DRAW_PILES[player - 1][len(pile) - 1][card] ^ ZOBRIST_HANDS[player - 1][len(hand)][card]
+        self._hand(player).append(self._draw_pile(player).pop(0))
+        return True
+
+    def undraw_card(self, player):
+        card = self._hand(player).pop()
+        pile = self._draw_pile(player)
+        self.hash ^= ZOBRIST_DRAW_PILES[player - 1][len(pile)][card] ^ ZOBRIST_HANDS[player - 1][len(self.hands[player - 1])][card]
+        pile.insert(0, card)
+
+    def end_turn(self):
+        self.turn = 3 - self.turn
+        self.hash ^= ZOBRIST_TURN
+
+    def calculate_values(self):
+        return [caravan.value for caravan in self.caravans]
+
+    def check_winning_condition(self):
+        return check_winning_condition(self.calculate_values())
+
+
+def deal(rng=random):
+    hand_1, draw_pile_1 = generate_valid_player_and_drawing_deck(rng=rng)
+    hand_2, draw_pile_2 = generate_valid_player_and_drawing_deck(rng=rng)
+    return GameState([hand_1, hand_2], [draw_pile_1, draw_pile_2])
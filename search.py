@@ -0,0 +1,169 @@
+import math
+import time
+
+from rules import MIN_CARAVAN_THRESHOLD, MAX_CARAVAN_THRESHOLD, DISCARD_CARAVAN, PLAY_CARD, GameState, Move
+
+
+class TranspositionTable:
+    # """
+    # Fixed-size table keyed by `GameState.hash`. An entry lives in slot `hash % size`, so lookups and stores are O(1)
+    # and the memory used never grows. When two states fight over a slot the one stored during the current generation
+    # (see `new_generation`) stays, entries left over from earlier turns are always replaced.
+    # """
+    def __init__(self, size_bits=16):
+        self.size = 1 << size_bits
+        self.mask = self.size - 1
+        self.keys: list = [None] * self.size
+        self.values: list = [None] * self.size
+        self.generations = [0] * self.size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        slot = key & self.mask
+        if self.keys[slot] == key:
+            self.hits += 1
+            return self.values[slot]
+        self.misses += 1
+        return default
+
+    def store(self, key, value):
+        slot = key & self.mask
+        if self.keys[slot] is not None and self.keys[slot] != key and self.generations[slot] == self.generation:
+            return False  # The entry in the slot belongs to this turn, keep it
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.generations[slot] = self.generation
+        return True
+
+    def new_generation(self):
+        # Call once per turn: every entry stored so far may be replaced from now on
+        self.generation += 1
+
+    def clear(self):
+        self.keys = [None] * self.size
+        self.values = [None] * self.size
+        self.generations = [0] * self.size
+        self.hits = 0
+        self.misses = 0
+
+
+def cached_legal_moves(state: GameState, table: TranspositionTable):
+    moves = table.get(state.hash)
+    if moves is None:
+        moves = state.legal_moves()
+        table.store(state.hash, moves)
+    return moves
+
+
+def move_key(state: GameState, move: Move):
+    # Hand indices point at different cards in different determinizations, so tree edges are keyed by the card instead
+    if move.kind == DISCARD_CARAVAN:
+        return move.kind, move.caravan_index
+    return move.kind, state.hands[state.turn - 1][move.hand_index], move.caravan_index, move.layer
+
+
+def is_sold(value):
+    return MIN_CARAVAN_THRESHOLD <= value <= MAX_CARAVAN_THRESHOLD
+
+
+def evaluate(state: GameState, player):
+    # """
+    # Reward in [0, 1] for `player`: 1 or 0 once the game is decided, otherwise the share of the three caravan pairs
+    # `player` is currently on track to win (a pair nobody leads counts as half).
+    # """
+    winner = state.check_winning_condition()
+    if winner is not None:
+        return 1.0 if winner == player else 0.0
+    values = state.calculate_values()
+    score = 0.0
+    for i in range(3):
+        own, other = (values[i], values[i + 3]) if player == 1 else (values[i + 3], values[i])
+        if is_sold(own) and (not is_sold(other) or own > other):
+            score += 1
+        elif not (is_sold(other) and (not is_sold(own) or other > own)):
+            score += 0.5
+    return score / 3
+
+
+class Node:
+    def __init__(self, parent=None, player=None):
+        self.parent: Node = parent
+        self.player = player  # Player who made the move leading to this node
+        self.children: dict = {}  # move_key -> Node
+        self.visits = 0
+        self.availability = 0  # Iterations in which the move leading here was legal
+        self.reward = 0.0
+
+    def ucb(self, exploration):
+        return self.reward / self.visits + exploration * math.sqrt(math.log(self.availability) / self.visits)
+
+
+def rollout(state: GameState, rng, depth):
+    # Mostly play cards, like `RandomPlayer`, otherwise discard-heavy playouts tell little about a position
+    for _ in range(depth):
+        if state.check_winning_condition() is not None:
+            return
+        moves = state.legal_moves()
+        if not moves:
+            return
+        plays = [move for move in moves if move.kind == PLAY_CARD]
+        state.apply(rng.choice(plays if plays and rng.random() < 0.95 else moves))
+
+
+def ismcts(
+        determinize, rng, time_budget_ms=None, max_iterations=None, exploration=0.7, rollout_depth=40, table=None,
+        cancel=None
+):
+    # """
+    # Single-observer information set MCTS. Every iteration draws a fresh determinization (`determinize(rng)` returns a
+    # `GameState` with the hidden cards filled in) and walks the shared tree restricted to the moves legal in it. Stops
+    # after `max_iterations` iterations or `time_budget_ms` milliseconds, whichever comes first, or as soon as the
+    # `cancel` event is set, and returns the `move_key` of the most visited root move (None if no iteration finished).
+    # """
+    root = Node()
+    deadline = None if time_budget_ms is None else time.perf_counter() + time_budget_ms / 1000
+    iterations = 0
+    while (
+            (max_iterations is None or iterations < max_iterations)
+            and (deadline is None or time.perf_counter() < deadline)
+            and (cancel is None or not cancel.is_set())
+    ):
+        state = determinize(rng)
+        node = root
+
+        # Selection and expansion
+        while state.check_winning_condition() is None:
+            moves = state.legal_moves() if table is None else cached_legal_moves(state, table)
+            if not moves:
+                break
+            keyed = [(move_key(state, move), move) for move in moves]
+            untried = [(key, move) for key, move in keyed if key not in node.children]
+            if untried:
+                key, move = rng.choice(untried)
+                node.children[key] = Node(node, state.turn)
+            for available_key, _ in keyed:
+                if available_key in node.children:
+                    node.children[available_key].availability += 1
+            if not untried:
+                key, move = max(keyed, key=lambda key_move: node.children[key_move[0]].ucb(exploration))
+            state.apply(move)
+            node = node.children[key]
+            if untried:
+                break
+
+        rollout(state, rng, rollout_depth)
+
+        # Backpropagation, rewards are seen from the side of the player who moved into each node
+        reward = evaluate(state, 1)
+        while node is not root:
+            node.visits += 1
+            node.reward += reward if node.player == 1 else 1 - reward
+            node = node.parent
+        root.visits += 1
+        iterations += 1
+
+    if not root.children:
+        return None
+    return max(root.children, key=lambda key: root.children[key].visits)
@@ -0,0 +1,106 @@
+import multiprocessing
+import random
+import time
+
+import rules
+from players import PLAYERS
+
+
+MAX_TURNS = 500
+
+
+def play_game(seed, player_names=('random', 'random'), max_turns=MAX_TURNS):
+    # """
+    # Play one full Standard Mode game without a window and return its summary. The game ends when a player wins, when
+    # the player to move has no legal move left, or after `max_turns` turns (both of the latter count as a draw).
+    # """
+    rng = random.Random(seed)
+    players = [PLAYERS[name](player=i + 1, rng=rng) for i, name in enumerate(player_names)]
+    state = rules.deal(rng)
+
+    winner = None
+    turns = 0
+    while turns < max_turns:
+        if not state.has_legal_move():
+            break
+        state.apply(players[state.turn - 1].select_move(state))
+        turns += 1
+        if (winner := state.check_winning_condition()) is not None:
+            break
+
+    return {'seed': seed, 'winner': winner, 'turns': turns, 'values': state.calculate_values()}
+
+
+def _play_game_job(args):
+    return play_game(*args)
+
+
+def simulate(num_games, player_names=('random', 'random'), workers=1, seed=None, max_turns=MAX_TURNS):
+    # """
+    # Yield the result of every game as soon as it finishes. Games are spread over a pool of `workers` processes, with
+    # `workers=1` everything runs in the calling process.
+    # """
+    for name in player_names:
+        if name not in PLAYERS:
+            raise ValueError(f'Unknown player "{name}", expected one of: {", ".join(PLAYERS)}')
+
+    base_seed = seed if seed is not None else random.randrange(2 ** 32)
+    jobs = ((base_seed + i, tuple(player_names), max_turns) for i in range(num_games))
+
+    if workers <= 1:
+        for job in jobs:
+            yield _play_game_job(job)
+        return
+
+    chunksize = max(1, min(64, num_games // (workers * 8)))
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(_play_game_job, jobs, chunksize=chunksize)
+
+
+def run(num_games, player_names=('random', 'random'), workers=1, seed=None, max_turns=MAX_TURNS, verbose=True):
+    wins = {1: 0, 2: 0, None: 0}
+    total_turns = 0
+    start_time = time.perf_counter()
+
+    for i, result in enumerate(simulate(num_games, player_names, workers, seed, max_turns)):
+        wins[result['winner']] += 1
+        total_turns += result['turns']
+        if verbose:
+            print(f'game {i + 1}: seed={result["seed"]} winner={result["winner"]} turns={result["turns"]} values={result["values"]}', flush=True)
+
+    elapsed = time.perf_counter() - start_time
+    print(f'{num_games} games in {elapsed:.2f}s ({num_games / max(elapsed, 1e-9):.0f} games/s), '
+          f'average {total_turns / max(num_games, 1):.1f} turns')
+    for player, name in zip([1, 2], player_names):
+        print(f'player {player} ({name}): {wins[player]} wins ({100 * wins[player] / max(num_games, 1):.1f}%)')
+    print(f'draws: {wins[None]}')
+    return wins
+
+
+def run_batch(num_games, player_names=('random', 'random'), seed=None, max_turns=MAX_TURNS, verbose=True):
+    # """
+    # Same report as `run`, but every game advances in lockstep inside the NumPy engine of `batch`. Only random
+    # players have a vectorized policy.
+    # """
+    import batch
+
+    if any(name != 'random' for name in player_names):
+        raise ValueError('The batch engine only supports random players')
+
+    start_time = time.perf_counter()
+    games = batch.play_random_games(num_games, seed, max_turns)
+    elapsed = time.perf_counter() - start_time
+
+    winners = games.winners.tolist()
+    if verbose:
+        values = games.calculate_values().tolist()
+        for i in range(num_games):
+            print(f'game {i + 1}: winner={winners[i] or None} turns={games.turn_counts[i]} values={values[i]}')
+
+    wins = {1: winners.count(1), 2: winners.count(2), None: winners.count(0)}
+    print(f'{num_games} games in {elapsed:.2f}s ({num_games / max(elapsed, 1e-9):.0f} games/s), '
+          f'average {games.turn_counts.mean():.1f} turns')
+    for player, name in zip([1, 2], player_names):
+        print(f'player {player} ({name}): {wins[player]} wins ({100 * wins[player] / max(num_games, 1):.1f}%)')
+    print(f'draws: {wins[None]}')
+    return wins
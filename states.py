@@ -1,13 +1,25 @@
 import numpy as np
 import pygame
-from pygame.locals import QUIT, MOUSEBUTTONUP, KEYUP, K_ESCAPE, K_MINUS, K_PLUS, K_EQUALS
+from pygame.locals import QUIT, MOUSEBUTTONUP, K_ESCAPE, K_MINUS, K_PLUS, K_EQUALS
 import graphics
+import events
+import rules
 # from graphics import WINDOW_WIDTH, WINDOW_HEIGHT
 from decks import *
 import random
-from cards import Card
+from cards import Card, card_pool
 from itertools import chain
 from players import *
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from resources import load_image
+from particles import ParticleSystem
+import tweens
+
+
+CARD_FLIGHT_MS = 550  # Time for a card to travel anywhere on the table
+CARD_FLIP_MS = 250  # Time for a card to turn edge-on, and again to turn back
+STANDARD_MODE_OPPONENT = 'ismcts'  # Any player type of `players.PLAYERS`
 
 
 class Context:
@@ -21,6 +33,10 @@ class Context:
         return self.state.is_running()
 
 
+player_2_executor = ThreadPoolExecutor(max_workers=1)  # Runs the AI of Standard Mode off the render loop
+scene_executor = ThreadPoolExecutor(max_workers=1)  # Builds the scenes the title screen leads to, see `TitleScreen`
+
+
 class State:
     def __init__(self, objects=None, animations=None, transition=False, audible=True):
         self.objects: dict[str, Button | Card | Deck | Caravan] = objects if objects else {}
@@ -28,6 +44,36 @@ class State:
         self.transition = transition
         self.audible = audible
 
+        self.hovered = None  # The one object under the mouse, see `hover`
+        self.hover_key = None
+
+        self.dealt_cards: list[Card] = []  # Taken from `card_pool`, see `give_back_cards`
+
+    def hover(self, x, y):
+        # """
+        # Hover the top-most object under the mouse, as picked from the grid of the last frame drawn. Nothing is done
+        # unless the mouse moved or the scene did, and then only the objects that stop or start being hovered are told.
+        # """
+        hover_key = x, y, graphics.render_list.version
+        if hover_key == self.hover_key:
+            return
+        self.hover_key = hover_key
+
+        hovered = graphics.render_list.pick(x, y)
+        if hovered is self.hovered:
+            return
+        if self.hovered is not None:
+            self.hovered.hover(x, y)
+            self.hovered.is_hovered = False  # Even if it still lies under the mouse, covered, or stopped being hoverable
+        if hovered is not None:
+            hovered.hover(x, y)
+        self.hovered = hovered
+
+    def give_back_cards(self):
+        # The scene is left for good, its cards go back to the pool to be dealt by the next game
+        card_pool.give_back(self.dealt_cards)
+        self.dealt_cards = []
+
     def handle_events(self):
         return self
 
@@ -65,13 +111,13 @@ class TitleScreen(State):
         )
 
         title_images = [
-            pygame.image.load('assets/texts/C.png'),
-            pygame.image.load('assets/texts/A.png'),
-            pygame.image.load('assets/texts/R.png'),
-            pygame.image.load('assets/texts/A.png'),
-            pygame.image.load('assets/texts/V.png'),
-            pygame.image.load('assets/texts/A.png'),
-            pygame.image.load('assets/texts/N.png'),
+            load_image('assets/texts/C.png'),
+            load_image('assets/texts/A.png'),
+            load_image('assets/texts/R.png'),
+            load_image('assets/texts/A.png'),
+            load_image('assets/texts/V.png'),
+            load_image('assets/texts/A.png'),
+            load_image('assets/texts/N.png'),
         ]
 
         self.title_names = [
@@ -91,6 +137,9 @@ class TitleScreen(State):
         self.animations.append(self.dancing_title_animation())
         self.animations.append(self.dancing_cards_animation())
 
+        self.preloaded_scenes = {}  # Scene class -> future of the scene, see `preload_scenes_animation`
+        self.animations.append(self.preload_scenes_animation())
+
     def handle_events(self):
         if _check_for_quit():
             return Quit(objects=self.objects, animations=self.animations)
@@ -99,12 +148,12 @@ class TitleScreen(State):
         for button in self.objects.values():
             button.hover(x, y)
 
-        for event in pygame.event.get(MOUSEBUTTONUP):
+        for event in events.get(MOUSEBUTTONUP):
             x, y = event.pos
             if self.objects['play_standard_mode_button'].rect.collidepoint(x, y):
-                return StandardMode(transition=True, audible=self.audible)
+                return self.enter_scene(StandardMode)
             elif self.objects['play_pvp_mode_button'].rect.collidepoint(x, y):
-                return PvPMode(transition=True, audible=self.audible)
+                return self.enter_scene(PvPMode)
             elif self.objects['exit_button'].rect.collidepoint(x, y):
                 return Quit()
             elif self.objects['mute_button'].rect.collidepoint(x, y):
@@ -118,14 +167,41 @@ class TitleScreen(State):
                     pygame.mixer.music.play()
 
 
-        for event in pygame.event.get(KEYUP):
-            if event.key == K_EQUALS:
+        for key in events.get_released_keys():
+            if key in [K_EQUALS, K_PLUS]:
                 self.title_cards_pause = max(10, self.title_cards_pause - 5)
-            elif event.key == K_MINUS:
+            elif key == K_MINUS:
                 self.title_cards_pause = min(100, self.title_cards_pause + 5)
 
         return self
 
+    def preload_scenes_animation(self):
+        # """
+        # Once the title screen is on screen, build both game scenes on a background worker while it idles, so that
+        # entering a game costs no construction time. Every title screen (again after "Go back") builds fresh ones.
+        # """
+        yield {'anonymous_button': self.objects['anonymous_button']}
+        for scene in [StandardMode, PvPMode]:
+            self.preloaded_scenes[scene] = scene_executor.submit(scene)
+
+    def enter_scene(self, scene):
+        # Hand over the preloaded scene, built right here if the worker has not started on it yet
+        def give_back_cards(future):
+            if future.exception() is None:
+                future.result().give_back_cards()
+
+        for other_scene, future in self.preloaded_scenes.items():
+            if other_scene is not scene and not future.cancel():
+                future.add_done_callback(give_back_cards)  # The scene not chosen deals its cards to the next game
+        future = self.preloaded_scenes.get(scene)
+        if future is None or future.cancel():
+            state = scene()
+        else:
+            state = future.result()
+        state.transition = True
+        state.audible = self.audible
+        return state
+
     def get_play_button_neutral_to_active_animation(self):
         play_button = self.objects['play_button']
         play_standard_mode_button = self.objects['play_standard_mode_button']
@@ -264,60 +340,75 @@ class StandardMode(State):
             'counter_2_caravan_C',
         ]
 
+        # """
+        # Caravan counters and the winner are only refreshed when a caravan reports a change.
+        # """
+        self.winner = None
+        self.is_winner_outdated = False
+        for counter_name, caravan_name in zip(self.counter_names, self.caravan_names):
+            self.objects[caravan_name].subscribe(
+                lambda caravan, counter=self.objects[counter_name]: self.on_caravan_change(caravan, counter)
+            )
+
         self.objects['go_back_button'] = Button(10, WINDOW_HEIGHT - 69, 128, 64, text='Go back')
 
-        closed_trash_image = pygame.transform.scale(pygame.image.load('assets/backgrounds/actual_trash.png'), (96, 96))
-        opened_trash_image = pygame.transform.scale(pygame.image.load('assets/backgrounds/actual_trash_open.png'), (96, 96))       
+        closed_trash_image = load_image('assets/backgrounds/actual_trash.png', (96, 96))
+        opened_trash_image = load_image('assets/backgrounds/actual_trash_open.png', (96, 96))
         self.objects['trash_button'] = Trash(
             WINDOW_WIDTH - 96, WINDOW_HEIGHT - 96, 96, 96, original_image=closed_trash_image, hovered_image=opened_trash_image
             )
 
         hand_cards, draw_cards = generate_valid_player_and_drawing_deck()
+        self.dealt_cards += hand_cards + draw_cards
 
         self.objects['player_1_playing_deck']: PlayingDeck = PlayingDeck(player=1, cards=generate_player_1_hand_cards(8, cards=hand_cards))
         self.objects['drawing_deck']: DrawingDeck = DrawingDeck(cards=generate_drawing_deck_1_cards(54, cards=draw_cards))
 
         hand_cards, draw_cards = generate_valid_player_and_drawing_deck()
+        self.dealt_cards += hand_cards + draw_cards
 
         self.objects['player_2_playing_deck']: PlayingDeck = PlayingDeck(player=2, cards=generate_player_2_hand_cards(8, cards=hand_cards))
         self.objects['drawing_deck_2']: DrawingDeck = DrawingDeck(cards=generate_drawing_deck_2_cards(54, cards=draw_cards))
 
+        self.card_index = CardIndex()  # Where every card lies, kept up to date by the decks themselves
+        for name in ['player_1_playing_deck', 'drawing_deck', 'player_2_playing_deck', 'drawing_deck_2', *self.caravan_names]:
+            self.card_index.track(self.objects[name])
+
         self.player_1_turn = True
         self.player_1_beginning_phase_counter = 3
-        self.player_2 = RandomPlayer()
+        self.player_2 = PLAYERS[STANDARD_MODE_OPPONENT](player=2)
+        self.player_2_future = None  # Move player 2 is thinking about in the background
+        self.player_2_cancel = None
 
         self.animation_cooldown = False
         self.animations.append(self.animation_cooldown_handler())
 
     def handle_events(self):
         if _check_for_quit():
+            self.cancel_player_2_turn()
             return Quit(objects=self.objects, animations=self.animations)
 
         previously_selected = None  # store previously selected object (mainly interested in cards)
         currently_selected = None  # store currently selected object
 
-        # """
-        # Update caravan counters.
-        # """
-        for counter_name, caravan_name in zip(self.counter_names, self.caravan_names):
-            self.objects[counter_name].text = f'{self.objects[caravan_name].calculate_value()}'
-
         # """
         # Handle mouse hovering over objects.
         # """
         x, y = pygame.mouse.get_pos()
+        self.hover(x, y)
         for value in self.objects.values():
-            value.hover(x, y)
             if value.check_if_selected():
                 previously_selected = value.get_selected()
 
         # """
         # Handle mouse click on objects.
         # """
-        for event in pygame.event.get(MOUSEBUTTONUP):
+        for event in events.get(MOUSEBUTTONUP):
             x, y = event.pos
 
             if self.objects['go_back_button'].collides_with(x, y):
+                self.cancel_player_2_turn()
+                self.give_back_cards()
                 return TitleScreen(transition=True, audible=self.audible)
 
             for value in self.objects.values():
@@ -328,7 +419,10 @@ class StandardMode(State):
         # """
         # Handle player victory.
         # """
-        if (player := self.check_winning_condition()) is not None:
+        if self.is_winner_outdated:
+            self.is_winner_outdated = False
+            self.winner = self.check_winning_condition()
+        if (player := self.winner) is not None:
             if len(self.animations) == 1:
                 self.animations.append(self.win_animation(player))
                 if self.audible:
@@ -349,10 +443,10 @@ class StandardMode(State):
             if currently_selected == self.objects['trash_button'] and self.player_1_beginning_phase_counter == 0:
                 self.player_1_turn = False
                 player_1_playing_deck.remove_card(previously_selected)
+                self.player_2.see_opponent_play(previously_selected.code)
                 self.animations.append(self.respace_player_hand_animation(PlayingDeck(cards=player_1_playing_deck.cards[:])))
 
-                player_1_playing_deck.add_card(self.objects['drawing_deck'].cards[0])
-                self.objects['drawing_deck'].cards.pop(0)
+                player_1_playing_deck.add_card(self.objects['drawing_deck'].pop_card(0))
                 self.animations.append(
                     chain(
                         self.translate_card_animation(previously_selected, -200, random.randint(0, WINDOW_HEIGHT), -500),
@@ -362,19 +456,15 @@ class StandardMode(State):
                         self.respace_player_hand_animation(player_1_playing_deck)
                     )
                 )
+                self.start_player_2_turn()
                 return self
             # """
             # Handle card being placed on a caravan.
             # """
             elif (
-                    any(self.objects[name].contains(currently_selected) for name in self.caravan_names) and previously_selected.is_face()
-                    or any(self.objects[name].contains(currently_selected) for name in self.caravan_names[:3]) and previously_selected.is_numerical()
+                    (at_deck := self.find_caravan_name(currently_selected, self.caravan_names)) is not None and previously_selected.is_face()
+                    or at_deck in self.caravan_names[:3] and previously_selected.is_numerical()
             ):
-                at_deck = 'anonymous_card'
-                for name in self.caravan_names:
-                    if self.objects[name].contains(currently_selected):
-                        at_deck = name
-                        break
                 if self.objects[at_deck].check_if_move_is_valid(previously_selected, currently_selected):
                     if self.player_1_beginning_phase_counter > 0:
                         if self.objects[at_deck].layers:
@@ -383,8 +473,12 @@ class StandardMode(State):
                             self.player_1_beginning_phase_counter = max(self.player_1_beginning_phase_counter - 1, 0)
                     self.player_1_turn = False
                     player_1_playing_deck.remove_card(previously_selected)
+                    self.player_2.see_opponent_play(previously_selected.code)
                     self.objects[at_deck].add_card_on(previously_selected, currently_selected)
                     currently_selected.is_selected = False
+                    face_card_target = None
+                    if previously_selected.rank in [RANK_J, RANK_JOKER]:
+                        face_card_target = self.caravan_names.index(at_deck), self.objects[at_deck].find_layer(previously_selected)
                     if previously_selected.rank not in [RANK_J, RANK_JOKER]:
                         self.animations.append(chain(
                             self.translate_card_on_top_of_card_animation(previously_selected, currently_selected, self.objects[at_deck]),
@@ -409,8 +503,7 @@ class StandardMode(State):
                             self.readjust_caravans_animation([self.objects[name] for name in self.caravan_names])
                         ))
                     if len(player_1_playing_deck.cards) < 5:
-                        player_1_playing_deck.add_card(top_card := self.objects['drawing_deck'].cards[0])
-                        self.objects['drawing_deck'].remove_card(top_card)
+                        player_1_playing_deck.add_card(top_card := self.objects['drawing_deck'].pop_card(0))
 
                         last_animation = self.animations.pop()
                         self.animations.append(self.respace_player_hand_animation(PlayingDeck(cards=player_1_playing_deck.cards[:-1])))
@@ -423,35 +516,39 @@ class StandardMode(State):
                         ))
                     else:
                         self.animations.append(self.respace_player_hand_animation(player_1_playing_deck))
+                    self.start_player_2_turn(face_card_target)
                     return self
 
         # """
         # Handle scenario if deck needs to be discarded.
         # """
-        if any(self.objects[name].contains(previously_selected) for name in self.caravan_names[:3]) and self.player_1_turn and not self.animation_cooldown:
+        if (caravan_name := self.find_caravan_name(previously_selected, self.caravan_names[:3])) is not None and self.player_1_turn and not self.animation_cooldown:
             if currently_selected == self.objects['trash_button'] and self.player_1_beginning_phase_counter == 0:
                 self.player_1_turn = False
-                caravan = ...
-                for deck in [self.objects[name] for name in self.caravan_names[:3]]:
-                    if deck.contains(previously_selected):
-                        caravan = deck
-                        break
+                caravan = self.objects[caravan_name]
                 for i, card in enumerate(caravan.cards[1:]):
                     caravan.remove_card(card)
                     self.animations.append(self.translate_card_animation(card, -200, random.randint(0, WINDOW_HEIGHT), -500, at_deck=f'anonymous_card_{i}'))
+                self.start_player_2_turn()
                 return self
 
         # """
         # Player 2 turn handling.
         # """
         if not self.player_1_turn and not self.animation_cooldown:
+            if self.player_2_future is None:
+                self.start_player_2_turn()
+            if not self.player_2_future.done():
+                return self
             self.player_1_turn = True
-            move_type, move = self.player_2.select_next_move(self.objects['player_2_playing_deck'], [self.objects[name] for name in self.caravan_names])
+            move_type, move = self.player_2.commit_move(
+                self.player_2_future.result(), self.objects['player_2_playing_deck'], [self.objects[name] for name in self.caravan_names]
+            )
+            self.player_2_future = None
             if move_type == DISCARD_CARD:
                 card = move
                 self.objects['player_2_playing_deck'].remove_card(card)
-                self.objects['player_2_playing_deck'].add_card(top_deck_card := self.objects['drawing_deck_2'].cards[0])
-                self.objects['drawing_deck_2'].remove_card(top_deck_card)
+                self.objects['player_2_playing_deck'].add_card(self.objects['drawing_deck_2'].pop_card(0))
                 self.animations.append(chain(
                     self.flip_over_card_animation(card),
                     self.wait_animation(.2),
@@ -500,8 +597,7 @@ class StandardMode(State):
                     ))
                 player_2_playing_deck = self.objects['player_2_playing_deck']
                 if len(player_2_playing_deck.cards) < 5:
-                    player_2_playing_deck.add_card(top_card := self.objects['drawing_deck_2'].cards[0])
-                    self.objects['drawing_deck_2'].remove_card(top_card)
+                    player_2_playing_deck.add_card(top_card := self.objects['drawing_deck_2'].pop_card(0))
 
                     last_animation = self.animations.pop()
                     self.animations.append(self.respace_player_hand_animation(PlayingDeck(cards=player_2_playing_deck.cards[:-1], player=2), player=2))
@@ -516,67 +612,54 @@ class StandardMode(State):
         return self
 
     def translate_card_animation(self, card, cx, cy, angle, at_deck='anonymous_card'):
-        curr_x, curr_y = card.center
-        curr_angle = card.angle
-        animation_speed = 45
-        for t in range(animation_speed):
-            offset_x = curr_x + (cx - curr_x) * t / (animation_speed - 1)
-            offset_y = curr_y + (cy - curr_y) * t / (animation_speed - 1)
-            offset_angle = curr_angle + (angle - curr_angle) * t / (animation_speed - 1)
-            card.set_at(offset_x, offset_y, offset_angle)
-            yield {at_deck: card}
+        return self.translate_cards_animation([card], [(cx, cy, angle)], [at_deck])
+
+    def translate_cards_animation(self, cards, targets, names):
+        # All `cards` travel to their (x, y, angle) `targets` together, kept in `objects` under `names` meanwhile
+        for _ in tweens.Track(cards, targets, CARD_FLIGHT_MS).frames():
+            yield dict(zip(names, cards))
 
     def flip_over_card_animation(self, card):
         curr_image = card.get_image()
         image_w, image_h = curr_image.get_size()
-        animation_speed = 20
-        for ts in [range(animation_speed), range(animation_speed, -1, -1)]:
-            for t in ts:
-                offset_image_w = image_w * (1 - t / animation_speed)
-                offset_image_h = image_h * (1 + 0.2 * t / animation_speed)
-                offset_image = pygame.transform.scale(curr_image, (offset_image_w, offset_image_h))
+        for is_closing in [True, False]:
+            for t in tweens.progress(CARD_FLIP_MS):
+                t = t if is_closing else 1 - t
+                offset_image = pygame.transform.scale(curr_image, (image_w * (1 - t), image_h * (1 + 0.2 * t)))
                 card.z_index = 100
                 card.set_image(offset_image)
                 yield {'anonymous_card': card}
-            if ts == range(animation_speed, -1, -1):
+            if not is_closing:
                 continue
             card.is_flipped = not card.is_flipped
             card.set_at(*card.center, -card.angle)
             curr_image = card.get_image()
 
     def respace_player_hand_animation(self, deck, player=1):
-        positions = list(deck.respace_cards_positions())
-        old_positions = [(*card.center, card.angle) for card in deck.cards]
-
-        animation_speed = 45
-        for t in range(animation_speed):
-            cards = []
-            for i, (card, (x, y, angle), (curr_x, curr_y, curr_angle)) in enumerate(zip(deck.cards, positions, old_positions)):
-                offset_x = curr_x + (x - curr_x) * t / (animation_speed - 1)
-                offset_y = curr_y + (y - curr_y) * t / (animation_speed - 1)
-                offset_angle = curr_angle + (angle - curr_angle) * t / (animation_speed - 1)
-                card.set_at(offset_x, offset_y, offset_angle)
+        cards = deck.cards[:]
+        for _ in tweens.Track(cards, deck.respace_cards_positions(), CARD_FLIGHT_MS).frames():
+            for i, card in enumerate(cards):
                 card.z_index = i
-                cards.append(card)
-            yield {f'player_{player}_playing_deck': PlayingDeck(cards=cards, player=player)}
+            # The tracked hand itself stays in `objects`, a copy in its place would fall out of the card index
+            yield {f'player_{player}_playing_deck': deck if deck.index is not None else PlayingDeck(cards=cards, player=player)}
 
     def wait_animation(self, seconds):
-        for t in range(int(graphics.FPS * seconds)):
+        for _ in tweens.wait(seconds * 1000):
             yield {'anonymous_button': self.objects['anonymous_button']}
 
     def translate_card_on_top_of_card_animation(self, card, on_top_of_card, deck):
         angle = random.randint(-5, 0)  # TODO: OCD Mode (when the angle is set to just 0)
         if deck.cards[0] == on_top_of_card:
             return self.translate_card_animation(card, *on_top_of_card.center, angle)
+        layer = deck.find_layer(on_top_of_card)
+        if layer == NO_LAYER:
+            return
+        layer_card, adjacents = deck.layers[layer]
         if card.is_numerical():
-            for layer_card, adjacents in deck.layers:
-                if layer_card == on_top_of_card or on_top_of_card in adjacents:
-                    return self.translate_card_animation(card, layer_card.center[0], layer_card.center[1] + 40, angle)
+            return self.translate_card_animation(card, layer_card.center[0], layer_card.center[1] + 40, angle)
         if card.is_face():
-            for layer_card, adjacents in deck.layers:
-                if layer_card == on_top_of_card or on_top_of_card in adjacents:
-                    offset_x = len(adjacents) * 20
-                    return self.translate_card_animation(card, layer_card.center[0] + offset_x, layer_card.center[1], angle)
+            offset_x = len(adjacents) * 20
+            return self.translate_card_animation(card, layer_card.center[0] + offset_x, layer_card.center[1], angle)
 
     def remove_outline_card_of_caravan(self, deck):
         if 'Placeholder' in str(type(deck.cards[0])):
@@ -584,15 +667,12 @@ class StandardMode(State):
         yield {'anonymous_button': self.objects['anonymous_button']}
 
     def activate_jack_card_animation(self, card, on_top_of_card, deck):
-        layer_card, adjacents = ..., ...
-        for layer_card, adjacents in deck.layers:
-            if on_top_of_card == layer_card or on_top_of_card in adjacents:
-                break
+        layer_card, adjacents = deck.layers[deck.find_layer(on_top_of_card)]
         deck.remove_card(layer_card)
         cards = [card, layer_card, *adjacents]
-        for i, c in enumerate(cards):
-            self.animations.append(self.translate_card_animation(c, -200, random.randint(0, WINDOW_HEIGHT), -500, at_deck=f'anonymous_card_{i}'))
-        yield {f'anonymous_card_{i}': c for i, c in enumerate(cards)}
+        names = [f'anonymous_card_{i}' for i in range(len(cards))]
+        self.animations.append(self.translate_cards_animation(cards, [(-200, random.randint(0, WINDOW_HEIGHT), -500) for _ in cards], names))
+        yield dict(zip(names, cards))
 
     def readjust_caravan_animation(self, deck: Caravan):
         starting_x = {1: 200, 2: 100}
@@ -602,42 +682,39 @@ class StandardMode(State):
         player = deck.player
         caravan = deck.caravan
 
+        cards, targets, names = [], [], []
         for i, (layer_card, adjacents) in enumerate(deck.layers):
             layer_card: Card
-            self.animations.append(self.translate_card_animation(layer_card, starting_x[player] + offset_x[caravan], starting_y[player] + 40 * i, layer_card.angle, at_deck=f'{str(deck)}_anonymous_card_{i}'))
+            cards.append(layer_card)
+            targets.append((starting_x[player] + offset_x[caravan], starting_y[player] + 40 * i, layer_card.angle))
+            names.append(f'{str(deck)}_anonymous_card_{i}')
             # layer_card.z_index = i * 5
             for j, adj in enumerate(adjacents):
                 adj: Card
-                self.animations.append(self.translate_card_animation(adj, starting_x[player] + offset_x[caravan] + 20 * (j + 1), starting_y[player] + 40 * i, adj.angle, at_deck=f'{str(deck)}_anonymous_card__{i}_{j}'))
+                cards.append(adj)
+                targets.append((starting_x[player] + offset_x[caravan] + 20 * (j + 1), starting_y[player] + 40 * i, adj.angle))
+                names.append(f'{str(deck)}_anonymous_card__{i}_{j}')
                 # adj.z_index = i * 5 + j + 1
+        self.animations.append(self.translate_cards_animation(cards, targets, names))
         # deck.update()
         yield {'anonymous_button': self.objects['anonymous_button']}
 
     def activate_joker_card_animation(self, card, on_top_of_card, decks: list[Caravan]):
-        remove_card_template = ...
-        for deck in decks:
-            if deck.contains(on_top_of_card):
-                for layer_card, adjacents in deck.layers:
-                    if layer_card == on_top_of_card or on_top_of_card in adjacents:
-                        remove_card_template = layer_card
-                        break
+        caravan_index, layer = 0, NO_LAYER
+        for i, deck in enumerate(decks):
+            if (layer := deck.find_layer(on_top_of_card)) != NO_LAYER:
+                caravan_index = i
+                break
 
         cards = []
-        for deck in decks:
-            for layer_card, adjacents in deck.layers[:]:
-                if (
-                    remove_card_template.rank == RANK_A and layer_card.suit == remove_card_template.suit
-                    or remove_card_template.rank != RANK_A and layer_card.rank == remove_card_template.rank
-                ):
-                    if layer_card == remove_card_template:
-                        continue
-                    deck.remove_card(layer_card)
-                    cards.append(layer_card)
-                    cards.extend(adjacents)
-                    # deck.update()
-        for i, c in enumerate(cards):
-            self.animations.append(self.translate_card_animation(c, -200, random.randint(0, WINDOW_HEIGHT), -500, at_deck=f'anonymous_card_{i}'))
-        yield {f'anonymous_button': self.objects['anonymous_button'], **{f'anonymous_card_{i}': c for i, c in enumerate(cards)}}
+        for i, j in rules.find_joker_targets([deck.state for deck in decks], caravan_index, layer):
+            layer_card, adjacents = decks[i].layers[j]
+            decks[i].remove_card(layer_card)
+            cards.append(layer_card)
+            cards.extend(adjacents)
+        names = [f'anonymous_card_{i}' for i in range(len(cards))]
+        self.animations.append(self.translate_cards_animation(cards, [(-200, random.randint(0, WINDOW_HEIGHT), -500) for _ in cards], names))
+        yield {f'anonymous_button': self.objects['anonymous_button'], **dict(zip(names, cards))}
 
     def readjust_caravans_animation(self, decks):
         for deck in decks:
@@ -656,20 +733,40 @@ class StandardMode(State):
                     self.objects[name].update()
             yield {'anonymous_button': self.objects['anonymous_button']}
 
-    def check_winning_condition(self):
-        c1, c2, c3, o1, o2, o3 = [self.objects[name].calculate_value() for name in self.caravan_names]
-        if (
-                not (21 <= c1 <= 26 or 21 <= o1 <= 26)
-                or not (21 <= c2 <= 26 or 21 <= o2 <= 26)
-                or not (21 <= c3 <= 26 or 21 <= o3 <= 26)
-        ):
-            return None  # There exists a set of competing caravans that does not contain a sold caravan
+    def on_caravan_change(self, caravan, counter):
+        counter.text = f'{caravan.calculate_value()}'
+        self.is_winner_outdated = True
 
-        if c1 == o1 or c2 == o2 or c3 == o3:
-            return None  # There exists a set of competing caravans that are tied
+    def find_caravan_name(self, card, caravan_names):
+        deck = self.card_index.deck_of(card)
+        for name in caravan_names:
+            if self.objects[name] is deck:
+                return name
+        return None
 
-        p1_win_count = sum([1 if y > 26 or 26 >= x > y else 0 for x, y in [(c1, o1), (c2, o2), (c3, o3)]])
-        return 1 if p1_win_count >= 2 else 2  # Return the number of the player that has more winning caravans
+    def start_player_2_turn(self, face_card_target=None):
+        # """
+        # Snapshot what player 2 can see and let it think on a worker thread while player 1's move is being animated,
+        # the move is collected once the animations are over. `face_card_target` is the (caravan index, layer) of a
+        # Jack or Joker player 1 just played: the cards it removes only leave the table later in the animation, so the
+        # removal is carried out on the snapshot instead.
+        # """
+        snapshot = self.player_2.observe(
+            self.objects['player_2_playing_deck'], [self.objects[name] for name in self.caravan_names],
+            [self.objects['drawing_deck'], self.objects['drawing_deck_2']]
+        )
+        if face_card_target is not None:
+            snapshot.resolve_face_card(*face_card_target)
+        self.player_2_cancel = threading.Event()
+        self.player_2_future = player_2_executor.submit(self.player_2.think, snapshot, self.player_2_cancel)
+
+    def cancel_player_2_turn(self):
+        if self.player_2_future is not None:
+            self.player_2_cancel.set()
+            self.player_2_future = None
+
+    def check_winning_condition(self):
+        return rules.check_winning_condition([self.objects[name].calculate_value() for name in self.caravan_names])
 
     def win_animation(self, player=1):
         self.animations.append(self.dancing_counter_animation(player))
@@ -708,34 +805,24 @@ class StandardMode(State):
                     yield {name: counter for name, counter in zip(counter_names, counters)}
 
     def winning_fireworks_animation(self):
-        fireworks = 0
-        while fireworks <= 150:
-            self.animations.append(self.single_firework_animation())
+        fireworks = ParticleSystem()
+        for _ in range(151):
+            fireworks.launch_firework(
+                random.randint(50, WINDOW_WIDTH - 50), WINDOW_HEIGHT + 6, random.randint(50, WINDOW_HEIGHT - 50),
+                travel_time=random.randint(20, 60),
+                color=(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255)),
+                size=random.randint(8, 16),
+                max_radius=random.randint(30, 100)
+            )
             for i in range(random.randint(5, 40)):
-                yield {'anonymous_button': self.objects['anonymous_button']}
-            fireworks += 1
-
-    def single_firework_animation(self):
-        color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-        x_pos = random.randint(50, WINDOW_WIDTH - 50)
-        height = random.randint(50, WINDOW_HEIGHT - 50)
-        travel_time = random.randint(20, 60)
-        size = random.randint(8, 16)
-        max_radius = random.randint(30, 100)
-
-        trajectory = [(WINDOW_HEIGHT - height + 6) * ((t - 1) ** 2) + height for t in np.linspace(0, 1, travel_time)]
-        for t in trajectory:
-            pygame.draw.rect(graphics.display_surf, color, (x_pos, t, size, size))
-            yield {'anonymous_button': self.objects['anonymous_button']}
-
-        radius_trajectory = [max_radius * t ** (1/6) for t in np.linspace(0, 1, 40)]
-        for r in radius_trajectory:
-            pygame.draw.circle(graphics.display_surf, color, (x_pos + 8, trajectory[-1]), r)
-            yield {'anonymous_button': self.objects['anonymous_button']}
+                yield from self.step_fireworks_animation(fireworks)
+        while len(fireworks):
+            yield from self.step_fireworks_animation(fireworks)
 
-        for i in range(1, 8):
-            pygame.draw.circle(graphics.display_surf, color, (x_pos + 8, trajectory[-1]), max_radius / i)
-            yield {'anonymous_button': self.objects['anonymous_button']}
+    def step_fireworks_animation(self, fireworks):
+        fireworks.step()
+        graphics.draw_effect(fireworks.draw)
+        yield {'anonymous_button': self.objects['anonymous_button']}
 
 
 class PvPMode(State):
@@ -787,24 +874,40 @@ class PvPMode(State):
             'counter_2_caravan_C',
         ]
 
+        # """
+        # Caravan counters and the winner are only refreshed when a caravan reports a change.
+        # """
+        self.winner = None
+        self.is_winner_outdated = False
+        for counter_name, caravan_name in zip(self.counter_names, self.caravan_names):
+            self.objects[caravan_name].subscribe(
+                lambda caravan, counter=self.objects[counter_name]: self.on_caravan_change(caravan, counter)
+            )
+
         self.objects['go_back_button'] = Button(10, WINDOW_HEIGHT - 69, 128, 64, text='Go back')
 
-        closed_trash_image = pygame.transform.scale(pygame.image.load('assets/backgrounds/actual_trash.png'), (96, 96))
-        opened_trash_image = pygame.transform.scale(pygame.image.load('assets/backgrounds/actual_trash_open.png'), (96, 96))       
+        closed_trash_image = load_image('assets/backgrounds/actual_trash.png', (96, 96))
+        opened_trash_image = load_image('assets/backgrounds/actual_trash_open.png', (96, 96))
         self.objects['trash_button'] = Trash(
             WINDOW_WIDTH - 96, WINDOW_HEIGHT - 96, 96, 96, original_image=closed_trash_image, hovered_image=opened_trash_image
             )
 
         hand_cards, draw_cards = generate_valid_player_and_drawing_deck()
+        self.dealt_cards += hand_cards + draw_cards
 
         self.objects['player_1_playing_deck']: PlayingDeck = PlayingDeck(player=1, cards=generate_player_1_hand_cards(8, cards=hand_cards))
         self.objects['drawing_deck']: DrawingDeck = DrawingDeck(cards=generate_drawing_deck_1_cards(54, cards=draw_cards))
 
         hand_cards, draw_cards = generate_valid_player_and_drawing_deck()
+        self.dealt_cards += hand_cards + draw_cards
 
         self.objects['player_2_playing_deck']: PlayingDeck = PlayingDeck(player=2, cards=generate_player_2_hand_cards(8, cards=hand_cards))
         self.objects['drawing_deck_2']: DrawingDeck = DrawingDeck(cards=generate_drawing_deck_2_cards(54, cards=draw_cards))
 
+        self.card_index = CardIndex()  # Where every card lies, kept up to date by the decks themselves
+        for name in ['player_1_playing_deck', 'drawing_deck', 'player_2_playing_deck', 'drawing_deck_2', *self.caravan_names]:
+            self.card_index.track(self.objects[name])
+
         self.player_1_turn = True
         self.player_1_beginning_phase_counter = 3
         self.player_2_beginning_phase_counter = 3
@@ -819,28 +922,23 @@ class PvPMode(State):
         previously_selected = None  # store previously selected object (mainly interested in cards)
         currently_selected = None  # store currently selected object
 
-        # """
-        # Update caravan counters.
-        # """
-        for counter_name, caravan_name in zip(self.counter_names, self.caravan_names):
-            self.objects[counter_name].text = f'{self.objects[caravan_name].calculate_value()}'
-
         # """
         # Handle mouse hovering over objects.
         # """
         x, y = pygame.mouse.get_pos()
+        self.hover(x, y)
         for value in self.objects.values():
-            value.hover(x, y)
             if value.check_if_selected():
                 previously_selected = value.get_selected()
 
         # """
         # Handle mouse click on objects.
         # """
-        for event in pygame.event.get(MOUSEBUTTONUP):
+        for event in events.get(MOUSEBUTTONUP):
             x, y = event.pos
 
             if self.objects['go_back_button'].collides_with(x, y):
+                self.give_back_cards()
                 return TitleScreen(transition=True, audible=self.audible)
 
             for value in self.objects.values():
@@ -851,7 +949,10 @@ class PvPMode(State):
         # """
         # Handle player victory.
         # """
-        if (player := self.check_winning_condition()) is not None:
+        if self.is_winner_outdated:
+            self.is_winner_outdated = False
+            self.winner = self.check_winning_condition()
+        if (player := self.winner) is not None:
             if len(self.animations) == 1:
                 self.animations.append(self.win_animation(player))
                 if self.audible:
@@ -874,8 +975,7 @@ class PvPMode(State):
                 player_1_playing_deck.remove_card(previously_selected)
                 self.animations.append(self.respace_player_hand_animation(PlayingDeck(cards=player_1_playing_deck.cards[:])))
 
-                player_1_playing_deck.add_card(self.objects['drawing_deck'].cards[0])
-                self.objects['drawing_deck'].cards.pop(0)
+                player_1_playing_deck.add_card(self.objects['drawing_deck'].pop_card(0))
                 self.animations.append(
                     chain(
                         self.translate_card_animation(previously_selected, -200, random.randint(0, WINDOW_HEIGHT), -500),
@@ -891,14 +991,9 @@ class PvPMode(State):
             # Handle card being placed on a caravan.
             # """
             elif (
-                    any(self.objects[name].contains(currently_selected) for name in self.caravan_names) and previously_selected.is_face()
-                    or any(self.objects[name].contains(currently_selected) for name in self.caravan_names[:3]) and previously_selected.is_numerical()
+                    (at_deck := self.find_caravan_name(currently_selected, self.caravan_names)) is not None and previously_selected.is_face()
+                    or at_deck in self.caravan_names[:3] and previously_selected.is_numerical()
             ):
-                at_deck = 'anonymous_card'
-                for name in self.caravan_names:
-                    if self.objects[name].contains(currently_selected):
-                        at_deck = name
-                        break
                 if self.objects[at_deck].check_if_move_is_valid(previously_selected, currently_selected):
                     if self.player_1_beginning_phase_counter > 0:
                         if self.objects[at_deck].layers:
@@ -933,8 +1028,7 @@ class PvPMode(State):
                             self.readjust_caravans_animation([self.objects[name] for name in self.caravan_names])
                         ))
                     if len(player_1_playing_deck.cards) < 5 and len(self.objects['drawing_deck'].cards) > 0:
-                        player_1_playing_deck.add_card(top_card := self.objects['drawing_deck'].cards[0])
-                        self.objects['drawing_deck'].remove_card(top_card)
+                        player_1_playing_deck.add_card(top_card := self.objects['drawing_deck'].pop_card(0))
 
                         last_animation = self.animations.pop()
                         self.animations.append(self.respace_player_hand_animation(PlayingDeck(cards=player_1_playing_deck.cards[:-1])))
@@ -956,14 +1050,10 @@ class PvPMode(State):
         # """
         # Handle scenario if deck needs to be discarded.
         # """
-        if any(self.objects[name].contains(previously_selected) for name in self.caravan_names[:3]) and self.player_1_turn and not self.animation_cooldown:
+        if (caravan_name := self.find_caravan_name(previously_selected, self.caravan_names[:3])) is not None and self.player_1_turn and not self.animation_cooldown:
             if currently_selected == self.objects['trash_button'] and self.player_1_beginning_phase_counter == 0:
                 self.player_1_turn = False
-                caravan = ...
-                for deck in [self.objects[name] for name in self.caravan_names[:3]]:
-                    if deck.contains(previously_selected):
-                        caravan = deck
-                        break
+                caravan = self.objects[caravan_name]
                 for i, card in enumerate(caravan.cards[1:]):
                     caravan.remove_card(card)
                     self.animations.append(self.translate_card_animation(card, -200, random.randint(0, WINDOW_HEIGHT), -500, at_deck=f'anonymous_card_{i}'))
@@ -985,8 +1075,7 @@ class PvPMode(State):
                 player_2_playing_deck.remove_card(previously_selected)
                 self.animations.append(self.respace_player_hand_animation(PlayingDeck(player=2, cards=player_2_playing_deck.cards[:]), player=2))
 
-                player_2_playing_deck.add_card(self.objects['drawing_deck_2'].cards[0])
-                self.objects['drawing_deck_2'].cards.pop(0)
+                player_2_playing_deck.add_card(self.objects['drawing_deck_2'].pop_card(0))
                 self.animations.append(
                     chain(
                         self.translate_card_animation(previously_selected, -200, random.randint(0, WINDOW_HEIGHT), -500),
@@ -1002,14 +1091,9 @@ class PvPMode(State):
             # Handle card being placed on a caravan.
             # """
             elif (
-                    any(self.objects[name].contains(currently_selected) for name in self.caravan_names) and previously_selected.is_face()
-                    or any(self.objects[name].contains(currently_selected) for name in self.caravan_names[3:]) and previously_selected.is_numerical()
+                    (at_deck := self.find_caravan_name(currently_selected, self.caravan_names)) is not None and previously_selected.is_face()
+                    or at_deck in self.caravan_names[3:] and previously_selected.is_numerical()
             ):
-                at_deck = 'anonymous_card'
-                for name in self.caravan_names:
-                    if self.objects[name].contains(currently_selected):
-                        at_deck = name
-                        break
                 if self.objects[at_deck].check_if_move_is_valid(previously_selected, currently_selected):
                     if self.player_2_beginning_phase_counter > 0:
                         if self.objects[at_deck].layers:
@@ -1044,8 +1128,7 @@ class PvPMode(State):
                             self.readjust_caravans_animation([self.objects[name] for name in self.caravan_names])
                         ))
                     if len(player_2_playing_deck.cards) < 5:
-                        player_2_playing_deck.add_card(top_card := self.objects['drawing_deck_2'].cards[0])
-                        self.objects['drawing_deck_2'].remove_card(top_card)
+                        player_2_playing_deck.add_card(top_card := self.objects['drawing_deck_2'].pop_card(0))
 
                         last_animation = self.animations.pop()
                         self.animations.append(self.respace_player_hand_animation(PlayingDeck(player=2, cards=player_2_playing_deck.cards[:-1]), player=2))
@@ -1067,14 +1150,10 @@ class PvPMode(State):
         # """
         # Handle scenario if deck needs to be discarded. (For player 2)
         # """
-        if any(self.objects[name].contains(previously_selected) for name in self.caravan_names[3:]) and not self.player_1_turn and not self.animation_cooldown:
+        if (caravan_name := self.find_caravan_name(previously_selected, self.caravan_names[3:])) is not None and not self.player_1_turn and not self.animation_cooldown:
             if currently_selected == self.objects['trash_button'] and self.player_2_beginning_phase_counter == 0:
                 self.player_1_turn = True
-                caravan = ...
-                for deck in [self.objects[name] for name in self.caravan_names[3:]]:
-                    if deck.contains(previously_selected):
-                        caravan = deck
-                        break
+                caravan = self.objects[caravan_name]
                 for i, card in enumerate(caravan.cards[1:]):
                     caravan.remove_card(card)
                     self.animations.append(self.translate_card_animation(card, -200, random.randint(0, WINDOW_HEIGHT), -500, at_deck=f'anonymous_card_2_{i}'))
@@ -1087,72 +1166,59 @@ class PvPMode(State):
         return self
 
     def translate_card_animation(self, card, cx, cy, angle, at_deck='anonymous_card'):
-        curr_x, curr_y = card.center
-        curr_angle = card.angle
-        animation_speed = 45
-        for t in range(animation_speed):
-            offset_x = curr_x + (cx - curr_x) * t / (animation_speed - 1)
-            offset_y = curr_y + (cy - curr_y) * t / (animation_speed - 1)
-            offset_angle = curr_angle + (angle - curr_angle) * t / (animation_speed - 1)
-            card.set_at(offset_x, offset_y, offset_angle)
-            yield {at_deck: card}
+        return self.translate_cards_animation([card], [(cx, cy, angle)], [at_deck])
+
+    def translate_cards_animation(self, cards, targets, names):
+        # All `cards` travel to their (x, y, angle) `targets` together, kept in `objects` under `names` meanwhile
+        for _ in tweens.Track(cards, targets, CARD_FLIGHT_MS).frames():
+            yield dict(zip(names, cards))
 
     def flip_over_card_animation(self, card):
         curr_image = card.get_image()
         image_w, image_h = curr_image.get_size()
-        animation_speed = 20
-        for ts in [range(animation_speed), range(animation_speed, -1, -1)]:
-            for t in ts:
-                offset_image_w = image_w * (1 - t / animation_speed)
-                offset_image_h = image_h * (1 + 0.2 * t / animation_speed)
-                offset_image = pygame.transform.scale(curr_image, (offset_image_w, offset_image_h))
+        for is_closing in [True, False]:
+            for t in tweens.progress(CARD_FLIP_MS):
+                t = t if is_closing else 1 - t
+                offset_image = pygame.transform.scale(curr_image, (image_w * (1 - t), image_h * (1 + 0.2 * t)))
                 card.z_index = 100
                 card.set_image(offset_image)
                 yield {'anonymous_card': card}
-            if ts == range(animation_speed, -1, -1):
+            if not is_closing:
                 continue
             card.is_flipped = not card.is_flipped
             card.set_at(*card.center, -card.angle)
             curr_image = card.get_image()
 
     def respace_player_hand_animation(self, deck, player=1):
-        positions = list(deck.respace_cards_positions())
-        old_positions = [(*card.center, card.angle) for card in deck.cards]
-
-        animation_speed = 45
-        for t in range(animation_speed):
-            cards = []
-            for i, (card, (x, y, angle), (curr_x, curr_y, curr_angle)) in enumerate(zip(deck.cards, positions, old_positions)):
-                offset_x = curr_x + (x - curr_x) * t / (animation_speed - 1)
-                offset_y = curr_y + (y - curr_y) * t / (animation_speed - 1)
-                offset_angle = curr_angle + (angle - curr_angle) * t / (animation_speed - 1)
-                card.set_at(offset_x, offset_y, offset_angle)
+        cards = deck.cards[:]
+        for _ in tweens.Track(cards, deck.respace_cards_positions(), CARD_FLIGHT_MS).frames():
+            for i, card in enumerate(cards):
                 card.z_index = i
-                cards.append(card)
-            yield {f'player_{player}_playing_deck': PlayingDeck(cards=cards, player=player)}
+            # The tracked hand itself stays in `objects`, a copy in its place would fall out of the card index
+            yield {f'player_{player}_playing_deck': deck if deck.index is not None else PlayingDeck(cards=cards, player=player)}
 
     def wait_animation(self, seconds):
-        for t in range(int(graphics.FPS * seconds)):
+        for _ in tweens.wait(seconds * 1000):
             yield {'anonymous_button': self.objects['anonymous_button']}
 
     def add_card_to_playing_deck_animation(self, card):
-        self.objects['player_1_playing_deck'].cards.append(card)
-        self.objects['drawing_deck'].cards.pop(0)
+        self.objects['drawing_deck'].pop_card(0)
+        self.objects['player_1_playing_deck'].add_card(card)
         yield {'anonymous_button': self.objects['anonymous_button']}
 
     def translate_card_on_top_of_card_animation(self, card, on_top_of_card, deck):
         angle = random.randint(-5, 0)  # TODO: OCD Mode (when the angle is set to just 0)
         if deck.cards[0] == on_top_of_card:
             return self.translate_card_animation(card, *on_top_of_card.center, angle)
+        layer = deck.find_layer(on_top_of_card)
+        if layer == NO_LAYER:
+            return
+        layer_card, adjacents = deck.layers[layer]
         if card.is_numerical():
-            for layer_card, adjacents in deck.layers:
-                if layer_card == on_top_of_card or on_top_of_card in adjacents:
-                    return self.translate_card_animation(card, layer_card.center[0], layer_card.center[1] + 40, angle)
+            return self.translate_card_animation(card, layer_card.center[0], layer_card.center[1] + 40, angle)
         if card.is_face():
-            for layer_card, adjacents in deck.layers:
-                if layer_card == on_top_of_card or on_top_of_card in adjacents:
-                    offset_x = len(adjacents) * 20
-                    return self.translate_card_animation(card, layer_card.center[0] + offset_x, layer_card.center[1], angle)
+            offset_x = len(adjacents) * 20
+            return self.translate_card_animation(card, layer_card.center[0] + offset_x, layer_card.center[1], angle)
 
     def remove_outline_card_of_caravan(self, deck):
         if 'Placeholder' in str(type(deck.cards[0])):
@@ -1160,15 +1226,12 @@ class PvPMode(State):
         yield {'anonymous_button': self.objects['anonymous_button']}
 
     def activate_jack_card_animation(self, card, on_top_of_card, deck):
-        layer_card, adjacents = ..., ...
-        for layer_card, adjacents in deck.layers:
-            if on_top_of_card == layer_card or on_top_of_card in adjacents:
-                break
+        layer_card, adjacents = deck.layers[deck.find_layer(on_top_of_card)]
         deck.remove_card(layer_card)
         cards = [card, layer_card, *adjacents]
-        for i, c in enumerate(cards):
-            self.animations.append(self.translate_card_animation(c, -200, random.randint(0, WINDOW_HEIGHT), -500, at_deck=f'anonymous_card_{i}'))
-        yield {f'anonymous_card_{i}': c for i, c in enumerate(cards)}
+        names = [f'anonymous_card_{i}' for i in range(len(cards))]
+        self.animations.append(self.translate_cards_animation(cards, [(-200, random.randint(0, WINDOW_HEIGHT), -500) for _ in cards], names))
+        yield dict(zip(names, cards))
 
     def readjust_caravan_animation(self, deck: Caravan):
         starting_x = {1: 200, 2: 100}
@@ -1178,40 +1241,37 @@ class PvPMode(State):
         player = deck.player
         caravan = deck.caravan
 
+        cards, targets, names = [], [], []
         for i, (layer_card, adjacents) in enumerate(deck.layers):
             layer_card: Card
-            self.animations.append(self.translate_card_animation(layer_card, starting_x[player] + offset_x[caravan], starting_y[player] + 40 * i, layer_card.angle, at_deck=f'{str(deck)}_anonymous_card_{i}'))
+            cards.append(layer_card)
+            targets.append((starting_x[player] + offset_x[caravan], starting_y[player] + 40 * i, layer_card.angle))
+            names.append(f'{str(deck)}_anonymous_card_{i}')
             for j, adj in enumerate(adjacents):
                 adj: Card
-                self.animations.append(self.translate_card_animation(adj, starting_x[player] + offset_x[caravan] + 20 * (j + 1), starting_y[player] + 40 * i, adj.angle, at_deck=f'{str(deck)}_anonymous_card__{i}_{j}'))
+                cards.append(adj)
+                targets.append((starting_x[player] + offset_x[caravan] + 20 * (j + 1), starting_y[player] + 40 * i, adj.angle))
+                names.append(f'{str(deck)}_anonymous_card__{i}_{j}')
+        self.animations.append(self.translate_cards_animation(cards, targets, names))
 
         yield {'anonymous_button': self.objects['anonymous_button']}
 
     def activate_joker_card_animation(self, card, on_top_of_card, decks: list[Caravan]):
-        remove_card_template = ...
-        for deck in decks:
-            if deck.contains(on_top_of_card):
-                for layer_card, adjacents in deck.layers:
-                    if layer_card == on_top_of_card or on_top_of_card in adjacents:
-                        remove_card_template = layer_card
-                        break
+        caravan_index, layer = 0, NO_LAYER
+        for i, deck in enumerate(decks):
+            if (layer := deck.find_layer(on_top_of_card)) != NO_LAYER:
+                caravan_index = i
+                break
 
         cards = []
-        for deck in decks:
-            for layer_card, adjacents in deck.layers[:]:
-                if (
-                    remove_card_template.rank == RANK_A and layer_card.suit == remove_card_template.suit
-                    or remove_card_template.rank != RANK_A and layer_card.rank == remove_card_template.rank
-                ):
-                    if layer_card == remove_card_template:
-                        continue
-                    deck.remove_card(layer_card)
-                    cards.append(layer_card)
-                    cards.extend(adjacents)
-                    # deck.update()
-        for i, c in enumerate(cards):
-            self.animations.append(self.translate_card_animation(c, -200, random.randint(0, WINDOW_HEIGHT), -500, at_deck=f'anonymous_card_{i}'))
-        yield {f'anonymous_button': self.objects['anonymous_button'], **{f'anonymous_card_{i}': c for i, c in enumerate(cards)}}
+        for i, j in rules.find_joker_targets([deck.state for deck in decks], caravan_index, layer):
+            layer_card, adjacents = decks[i].layers[j]
+            decks[i].remove_card(layer_card)
+            cards.append(layer_card)
+            cards.extend(adjacents)
+        names = [f'anonymous_card_{i}' for i in range(len(cards))]
+        self.animations.append(self.translate_cards_animation(cards, [(-200, random.randint(0, WINDOW_HEIGHT), -500) for _ in cards], names))
+        yield {f'anonymous_button': self.objects['anonymous_button'], **dict(zip(names, cards))}
 
     def readjust_caravans_animation(self, decks):
         for deck in decks:
@@ -1230,20 +1290,19 @@ class PvPMode(State):
                     self.objects[name].update()
             yield {'anonymous_button': self.objects['anonymous_button']}
 
-    def check_winning_condition(self):
-        c1, c2, c3, o1, o2, o3 = [self.objects[name].calculate_value() for name in self.caravan_names]
-        if (
-                not (21 <= c1 <= 26 or 21 <= o1 <= 26)
-                or not (21 <= c2 <= 26 or 21 <= o2 <= 26)
-                or not (21 <= c3 <= 26 or 21 <= o3 <= 26)
-        ):
-            return None  # There exists a set of competing caravans that does not contain a sold caravan
+    def on_caravan_change(self, caravan, counter):
+        counter.text = f'{caravan.calculate_value()}'
+        self.is_winner_outdated = True
 
-        if c1 == o1 or c2 == o2 or c3 == o3:
-            return None  # There exists a set of competing caravans that are tied
+    def find_caravan_name(self, card, caravan_names):
+        deck = self.card_index.deck_of(card)
+        for name in caravan_names:
+            if self.objects[name] is deck:
+                return name
+        return None
 
-        p1_win_count = sum([1 if y > 26 or 26 >= x > y else 0 for x, y in [(c1, o1), (c2, o2), (c3, o3)]])
-        return 1 if p1_win_count >= 2 else 2  # Return the number of the player that has more winning caravans
+    def check_winning_condition(self):
+        return rules.check_winning_condition([self.objects[name].calculate_value() for name in self.caravan_names])
 
     def win_animation(self, player=1):
         self.animations.append(self.dancing_counter_animation(player))
@@ -1311,34 +1370,24 @@ class PvPMode(State):
             )
 
     def winning_fireworks_animation(self):
-        fireworks = 0
-        while fireworks <= 150:
-            self.animations.append(self.single_firework_animation())
+        fireworks = ParticleSystem()
+        for _ in range(151):
+            fireworks.launch_firework(
+                random.randint(50, WINDOW_WIDTH - 50), WINDOW_HEIGHT + 6, random.randint(50, WINDOW_HEIGHT - 50),
+                travel_time=random.randint(20, 60),
+                color=(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255)),
+                size=random.randint(8, 16),
+                max_radius=random.randint(30, 100)
+            )
             for i in range(random.randint(5, 40)):
-                yield {'anonymous_button': self.objects['anonymous_button']}
-            fireworks += 1
-
-    def single_firework_animation(self):
-        color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-        x_pos = random.randint(50, WINDOW_WIDTH - 50)
-        height = random.randint(50, WINDOW_HEIGHT - 50)
-        travel_time = random.randint(20, 60)
-        size = random.randint(8, 16)
-        max_radius = random.randint(30, 100)
-
-        trajectory = [(WINDOW_HEIGHT - height + 6) * ((t - 1) ** 2) + height for t in np.linspace(0, 1, travel_time)]
-        for t in trajectory:
-            pygame.draw.rect(graphics.display_surf, color, (x_pos, t, size, size))
-            yield {'anonymous_button': self.objects['anonymous_button']}
+                yield from self.step_fireworks_animation(fireworks)
+        while len(fireworks):
+            yield from self.step_fireworks_animation(fireworks)
 
-        radius_trajectory = [max_radius * t ** (1/6) for t in np.linspace(0, 1, 40)]
-        for r in radius_trajectory:
-            pygame.draw.circle(graphics.display_surf, color, (x_pos + 8, trajectory[-1]), r)
-            yield {'anonymous_button': self.objects['anonymous_button']}
-
-        for i in range(1, 8):
-            pygame.draw.circle(graphics.display_surf, color, (x_pos + 8, trajectory[-1]), max_radius / i)
-            yield {'anonymous_button': self.objects['anonymous_button']}
+    def step_fireworks_animation(self, fireworks):
+        fireworks.step()
+        graphics.draw_effect(fireworks.draw)
+        yield {'anonymous_button': self.objects['anonymous_button']}
 
 
 class Quit(State):
@@ -1353,25 +1402,19 @@ class Quit(State):
 
 
 def _check_for_quit():
-    if len(pygame.event.get(eventtype=QUIT)) > 0:
-        return True
-    for event in pygame.event.get(KEYUP):
-        if event.key == K_ESCAPE:
-            return True
-        pygame.event.post(event)
-    return False
+    return len(events.get(QUIT)) > 0 or K_ESCAPE in events.get_released_keys()
 
 
 class Button:
     def __init__(self, left, top, width, height, center_x=None, center_y=None, text='', is_clickable=True,
                  is_hovered=False, is_visible=True, z_index=0, is_hoverable=True, font_size=40, font_color=(0, 0, 0), color=(255, 255, 255, 255),
                  original_image=None, hovered_image=None):
+        # Images are shared (see `resources`), they are only ever replaced, never drawn on
         if original_image:
             self.original_image = original_image
-            self.image = original_image.copy()
         else:
-            self.original_image = pygame.transform.scale(pygame.image.load('assets/backgrounds/button.png'), (width, height)).convert_alpha()
-            self.image = pygame.transform.scale(pygame.image.load('assets/backgrounds/button.png'), (width, height)).convert_alpha()
+            self.original_image = load_image('assets/backgrounds/button.png', (width, height))
+        self.image = self.original_image
 
         self.rect = pygame.Rect(left, top, width, height)
         if center_x and center_y:
@@ -1385,7 +1428,7 @@ class Button:
         if hovered_image:
             self.hovered_image = hovered_image
         else:
-            self.hovered_image = self.image.copy()
+            self.hovered_image = self.image
 
         self.is_clickable = is_clickable
         self.is_hoverable = is_hoverable
@@ -1476,10 +1519,10 @@ class Mute(Button):
         super().__init__(left, top, width, height, center_x, center_y, text, is_clickable, is_hovered, is_visible, z_index, is_hoverable)
 
         self.images = {
-            'sound_neutral': pygame.image.load('assets/backgrounds/sound_button_neutral.png'),
-            'sound_neutral_hovered': pygame.image.load('assets/backgrounds/sound_button_hover.png'),
-            'sound_mute': pygame.image.load('assets/backgrounds/sound_muted_button_neutral.png'),
-            'sound_mute_hovered': pygame.image.load('assets/backgrounds/sound_muted_button_hover.png')
+            'sound_neutral': load_image('assets/backgrounds/sound_button_neutral.png'),
+            'sound_neutral_hovered': load_image('assets/backgrounds/sound_button_hover.png'),
+            'sound_mute': load_image('assets/backgrounds/sound_muted_button_neutral.png'),
+            'sound_mute_hovered': load_image('assets/backgrounds/sound_muted_button_hover.png')
         }
         self.is_neutral = is_neutral
 
@@ -0,0 +1,67 @@
+import numpy as np
+import pygame
+
+
+# """
+# Animations timed on the clock instead of counted in frames. A dropped frame makes them skip ahead rather than slow
+# down, they last as long at 30 frames per second as at 80. Everything here is still a generator stepped once per frame
+# from `state.animations`, so they chain with the frame-based animations as before.
+# """
+def now():
+    return pygame.time.get_ticks()
+
+
+def linear(t):
+    return t
+
+
+def ease_in_out(t):
+    return t * t * (3 - 2 * t)
+
+
+def progress(duration, easing=linear, start=None):
+    # """
+    # Eased progress from 0 to 1, yielded once per frame for `duration` milliseconds of the clock. The clock starts at
+    # `start`, or on the first frame if it is None, and the last value yielded is always exactly `easing(1)`.
+    # """
+    if start is None:
+        start = now()
+    while (elapsed := now() - start) < duration:
+        yield easing(min(max(elapsed / duration, 0.0), 1.0))
+    yield easing(1.0)
+
+
+def wait(duration):
+    # Yields once per frame until `duration` milliseconds have gone by
+    end = now() + duration
+    while now() < end:
+        yield
+
+
+class Track:
+    # """
+    # Tween of the (x, y, angle) of a group of cards, from wherever they are when the track starts to `targets`, one row
+    # per card. The whole group is interpolated with one NumPy operation per frame, the cards only get `set_at` called.
+    # """
+    def __init__(self, cards, targets, duration, easing=linear, start=None):
+        self.cards = list(cards)
+        self.targets = np.array(targets, dtype=float).reshape(len(self.cards), 3)
+        self.duration = duration
+        self.easing = easing
+        self.start = start
+        self.origins = None
+        self.is_finished = False
+
+    def sample(self, t):
+        if self.origins is None:
+            self.origins = np.array([(*card.center, card.angle) for card in self.cards], dtype=float).reshape(-1, 3)
+        values = self.origins + (self.targets - self.origins) * t
+        for card, (x, y, angle) in zip(self.cards, values.tolist()):
+            card.set_at(x, y, angle)
+
+    def frames(self):
+        # Moves the cards once per frame, until the track is finished
+        for t in progress(self.duration, self.easing, self.start):
+            self.sample(t)
+            yield
+        self.is_finished = True